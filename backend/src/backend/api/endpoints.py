@@ -1,9 +1,18 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-import time
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import orjson
+from time import perf_counter_ns
 import asyncio
+import base64
+import hashlib
+import os
+from collections import defaultdict
 import numpy as np
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Any, Tuple, Optional, Union
 
 from backend.api.models import (
     ExpressionRequest, ParseRequest, BatchExpressionRequest, ParameterUpdateRequest,
@@ -11,12 +20,137 @@ from backend.api.models import (
     GraphDataResponse, Surface3DRequest, Parametric3DRequest, Evaluation3DResponse,
     GraphData3DResponse, CoordinatePoint3D
 )
-from backend.core.math_engine import evaluator
-from backend.core.cache import get_cache, generate_cache_key
+from backend.core.math_engine import get_evaluator, compile_kernel, clear_kernel_cache, require_bound, linspace_grid, nan_invalid, finite_summary, available_cpus
+from backend.core.cache import get_cache, generate_cache_key, jittered_ttl, negative_entry, is_negative_entry
 from backend.core.config import settings
 
 router = APIRouter()
 
+# Points per streamed NDJSON line (4KB of float32)
+STREAM_CHUNK_POINTS = 1024
+
+# Settings read on every request, resolved once at import
+_CACHE_TTL = settings.CACHE_TTL
+_CACHE_TTL_JITTER = settings.CACHE_TTL_JITTER
+_NEGATIVE_CACHE_TTL = settings.NEGATIVE_CACHE_TTL
+_MAX_BATCH = settings.MAX_BATCH_SIZE
+
+# Liveness probe body, serialized once
+_HEALTH_BYTES = b'{"status":"healthy","service":"grapher-api"}'
+
+# Worker threads for CPU-bound evaluation; numpy and numexpr release the GIL
+EVALUATION_WORKERS = min(8, available_cpus())
+_pool = ThreadPoolExecutor(max_workers=EVALUATION_WORKERS, thread_name_prefix="grapher-eval")
+
+def float32_base64(values: np.ndarray) -> str:
+    """Encode values as a base64 string of little-endian float32"""
+    return base64.b64encode(np.asarray(values, dtype='<f4').tobytes()).decode('ascii')
+
+def _model_fields(obj: Any) -> Dict[str, Any]:
+    """orjson fallback that serializes models through their field values, skipping unset optionals"""
+    if isinstance(obj, BaseModel):
+        return {name: value for name, value in obj.__dict__.items() if value is not None}
+    raise TypeError
+
+class OrjsonResponse(Response):
+    """JSON response rendered by orjson, with NumPy arrays and scalars serialized natively"""
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class ModelORJSONResponse(OrjsonResponse):
+    """
+    orjson response for trusted, server-built models created with model_construct.
+    Bypasses response_model re-validation and Pydantic serialization of every point.
+    """
+    def render(self, content: Any) -> bytes:
+        return render_model(content)
+
+def render_model(content: Any) -> bytes:
+    """Encode a model_construct response body the way ModelORJSONResponse sends it"""
+    return orjson.dumps(content, default=_model_fields, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def evaluation_response(expression: str, graph_data: Dict[str, Any], evaluation_time_ms: float) -> EvaluationResponse:
+    """
+    Wrap engine-built graph data without validating it point by point.
+    Skips creating one CoordinatePoint model per point; the floats are produced server-side.
+    """
+    return EvaluationResponse.model_construct(
+        expression=expression,
+        graph_data=GraphDataResponse.model_construct(**graph_data),
+        evaluation_time_ms=evaluation_time_ms
+    )
+
+@lru_cache(maxsize=1024)
+def classify_expression(expression: str) -> Mapping[str, Any]:
+    """Parse and classify an expression once; the result depends only on the expression text"""
+    return MappingProxyType(get_evaluator().parse_and_classify_expression(expression))
+
+@lru_cache(maxsize=1024)
+def validate_expression(expression: str) -> Tuple[bool, Optional[str]]:
+    """Memoized expression validation for repeated parameter updates"""
+    return get_evaluator().parser.validate_expression(expression)
+
+def parameter_etag(expression: str, variables: Dict[str, float], x_range: Tuple[float, float],
+                   layout: str = "aos") -> str:
+    """Strong ETag identifying an /update-params request's inputs"""
+    # Non-default layouts produce a different body, so they get their own tag
+    suffix = f"|{layout}" if layout != "aos" else ""
+    digest = hashlib.blake2b(
+        f"{expression}|{sorted(variables.items())}|{tuple(x_range)}{suffix}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+def finite_points(x_values, y_values):
+    """
+    Drop NaN/infinite pairs with a single vectorized mask and return the filtered arrays.
+    Fully finite input comes back uncopied; otherwise the kept indices are taken from both axes.
+    """
+    # Float input keeps its precision, so single-precision curves are not widened here
+    x_values, y_values = np.asarray(x_values), np.asarray(y_values)
+    if x_values.dtype.kind != 'f':
+        x_values = x_values.astype(np.float64)
+    if y_values.dtype.kind != 'f':
+        y_values = y_values.astype(np.float64)
+    mask = np.isfinite(x_values)
+    mask &= np.isfinite(y_values)
+    if mask.all():
+        return x_values, y_values
+    kept = np.flatnonzero(mask)
+    return x_values.take(kept), y_values.take(kept)
+
+def points_range(values, default: Tuple[float, float]) -> Tuple[float, float]:
+    """(min, max) of values already filtered to finite points, or default when there are none"""
+    # Plain reductions: the filter already did the NaN check value_range would repeat
+    return (float(values.min()), float(values.max())) if values.size else default
+
+def request_dtype(request: Union[ExpressionRequest, ParametricRequest]) -> type:
+    """Sample and evaluation dtype: float64 unless the request turns high_precision off"""
+    return np.float64 if request.high_precision is not False else np.float32
+
+def coordinate_payload(columns, layout="aos"):
+    """
+    Lay out already-filtered coordinate columns for the response:
+    'aos' builds one dict per point, 'soa' returns each axis as a flat array,
+    'binary' returns each axis as a base64 little-endian float32 buffer.
+    'soa' columns go to orjson as contiguous arrays, serialized natively without a list per axis;
+    single-precision columns also print at float32 length.
+    """
+    if layout == "binary":
+        return {f"{axis}_b64": float32_base64(values) for axis, values in columns.items()}
+    if layout == "soa":
+        return {axis: np.ascontiguousarray(values) for axis, values in columns.items()}
+    axes = tuple(columns)
+    points = zip(*(values.tolist() for values in columns.values()))
+    # Dict displays for the usual axes build each point without a zip and dict() call
+    if axes == ("x", "y"):
+        return {"coordinates": [{"x": x, "y": y} for x, y in points]}
+    if axes == ("x", "y", "z"):
+        return {"coordinates": [{"x": x, "y": y, "z": z} for x, y, z in points]}
+    return {"coordinates": [dict(zip(axes, point)) for point in points]}
+
 @router.post("/parse", response_model=ParseResponse)
 async def parse_expression(request: ParseRequest):
     """
@@ -24,7 +158,7 @@ async def parse_expression(request: ParseRequest):
     """
     try:
         # Parse and classify expression
-        classification = evaluator.parse_and_classify_expression(request.expression)
+        classification = classify_expression(request.expression)
         
         return ParseResponse(
             is_valid=classification['is_valid'],
@@ -45,244 +179,324 @@ async def evaluate_expression(request: ExpressionRequest):
     """
     Evaluate a mathematical expression (explicit, implicit, or parametric) and generate graph data.
     """
-    start_time = time.time()
+    start_time = perf_counter_ns()
     
     try:
         # Parse and classify expression
-        classification = evaluator.parse_and_classify_expression(request.expression)
+        classification = classify_expression(request.expression)
         
         if not classification['is_valid']:
             raise HTTPException(status_code=400, detail=classification.get('error', 'Invalid expression'))
         
-        coordinates = []
-        valid_count = 0
         x_range = request.x_range
-        y_range = (0.0, 1.0)
         
         if classification['type'] == 'implicit':
             # Handle implicit equations (f(x, y) = 0)
-            x_coords, y_coords = evaluator.solve_implicit_equation(
+            x_values, y_values = get_evaluator().solve_implicit_equation(
                 request.expression,
                 x_range,
                 request.num_points,
                 request.variables
             )
-            
-# Create coordinate points for implicit equation
-            for x, y in zip(x_coords, y_coords):
-                if not np.isnan(y) and not np.isinf(y):
-                    coordinates.append({"x": float(x), "y": float(y)})
-                    valid_count += 1
-                     
-        elif classification['type'] == 'parametric':
-            # Handle parametric equations as explicit for now
-            x_values = np.linspace(x_range[0], x_range[1], request.num_points)
-            y_values = evaluator.evaluate_expression(
-                classification.get('processed_expression', request.expression), 
-                x_values, 
-                request.variables
-            )
-            
-            # Create coordinate points
-            for x, y in zip(x_values, y_values):
-                if not np.isnan(y) and not np.isinf(y):
-                    coordinates.append({"x": float(x), "y": float(y)})
-                    valid_count += 1
-                    
-        else:  # explicit function
-            # Handle explicit functions y = f(x)
-            x_values = np.linspace(x_range[0], x_range[1], request.num_points)
-            y_values = evaluator.evaluate_expression(
-                classification.get('processed_expression', request.expression), 
-                x_values, 
+            xs, ys = finite_points(x_values, y_values)
+        
+        else:  # explicit function; parametric equations are handled as explicit for now
+            # Evaluate y = f(x) and drop invalid points in one fused pass
+            xs, ys = get_evaluator().evaluate_finite_points(
+                classification.get('processed_expression', request.expression),
+                linspace_grid(x_range[0], x_range[1], request.num_points, request_dtype(request)),
                 request.variables
             )
-            
-            # Create coordinate points
-            for x, y in zip(x_values, y_values):
-                if not np.isnan(y) and not np.isinf(y):
-                    coordinates.append({"x": float(x), "y": float(y)})
-                    valid_count += 1
-        
-        # Calculate y range
-        if coordinates:
-            y_coords = [point["y"] for point in coordinates]
-            y_range = (min(y_coords), max(y_coords)) if y_coords else (0.0, 1.0)
+        
+        # Create coordinate points
+        coordinates = coordinate_payload({"x": xs, "y": ys}, request.format)
+        valid_count = int(xs.size)
+        
+        # Calculate y range over the already-finite points
+        y_range = points_range(ys, (0.0, 1.0))
         
         # Create response
-        end_time = time.time()
-        
-        return EvaluationResponse(
-            expression=request.expression,
-            graph_data=GraphDataResponse(
-                coordinates=coordinates,
-                total_points=request.num_points,
-                valid_points=valid_count,
-                x_range=x_range,
-                y_range=y_range
-            ),
-            evaluation_time_ms=(end_time - start_time) * 1000
-        )
+        end_time = perf_counter_ns()
+        graph_data = dict(coordinates, total_points=request.num_points, valid_points=valid_count,
+                          x_range=x_range, y_range=y_range)
+        
+        return ModelORJSONResponse(evaluation_response(request.expression, graph_data, (end_time - start_time) / 1e6))
         
     except HTTPException:
         raise
     except Exception as e:
-        end_time = time.time()
+        end_time = perf_counter_ns()
         raise HTTPException(
             status_code=400, 
             detail=str(e),
-            headers={"X-Evaluation-Time-ms": str((end_time - start_time) * 1000)}
+            headers={"X-Evaluation-Time-ms": str((end_time - start_time) / 1e6)}
         )
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Expression evaluation failed: {str(e)}")
 
+@router.post("/evaluate/stream")
+async def stream_expression(request: ExpressionRequest):
+    """
+    Stream y = f(x) as NDJSON: a header line describing the x grid, then base64 float32
+    chunks of the y values, evaluated once on the worker pool. Invalid points are NaN so
+    every chunk lines up with the grid.
+    """
+    classification = classify_expression(request.expression)
+    if not classification['is_valid']:
+        raise HTTPException(status_code=400, detail=classification.get('error', 'Invalid expression'))
+    if classification['type'] == 'implicit':
+        raise HTTPException(status_code=400, detail="Streaming supports explicit functions only")
+    
+    expression = classification.get('processed_expression', request.expression)
+    dtype = request_dtype(request)
+    try:
+        compile_kernel(expression, dtype)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    x_values = linspace_grid(request.x_range[0], request.x_range[1], request.num_points, dtype)
+    try:
+        y_values = await asyncio.get_running_loop().run_in_executor(
+            _pool, get_evaluator().evaluate_expression, expression, x_values, request.variables
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    y_values = np.broadcast_to(y_values, x_values.shape)
+    
+    async def lines():
+        yield orjson.dumps({
+            "expression": request.expression,
+            "x_range": request.x_range,
+            "num_points": request.num_points,
+            "dtype": "float32",
+            "chunk_points": STREAM_CHUNK_POINTS
+        }) + b"\n"
+        for offset in range(0, y_values.size, STREAM_CHUNK_POINTS):
+            y_chunk = y_values[offset:offset + STREAM_CHUNK_POINTS]
+            yield orjson.dumps({"offset": offset, "y": float32_base64(y_chunk)}) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.post("/batch-evaluate", response_model=BatchEvaluationResponse)
 async def batch_evaluate_expressions(request: BatchExpressionRequest):
     """
     Evaluate multiple expressions in parallel.
     """
-    if len(request.expressions) > settings.MAX_BATCH_SIZE:
+    if len(request.expressions) > _MAX_BATCH:
         raise HTTPException(
             status_code=400, 
-            detail=f"Batch size exceeds maximum of {settings.MAX_BATCH_SIZE} expressions"
+            detail=f"Batch size exceeds maximum of {_MAX_BATCH} expressions"
         )
     
-    start_time = time.time()
+    start_time = perf_counter_ns()
     
     try:
-        # Create tasks for parallel evaluation
-        tasks = []
-        for expression in request.expressions:
-            # Create individual expression request
-            expr_request = ExpressionRequest(
-                expression=expression,
-                variables=request.variables,
-                x_range=request.x_range,
-                num_points=request.num_points
+        # Evaluate each distinct expression once and fan the result back out
+        groups = defaultdict(list)
+        for i, expression in enumerate(request.expressions):
+            groups[expression].append(i)
+        unique_expressions = list(groups)
+        
+        # Look up every unique expression with a single cache round-trip
+        cache = get_cache()
+        keys = [
+            generate_cache_key(expression, request.variables, request.x_range, request.format, request.num_points)
+            for expression in unique_expressions
+        ]
+        unique_results = await cache.mget(keys) if cache else [None] * len(keys)
+        unique_results = [
+            ValueError(result['error']) if is_negative_entry(result) else result
+            for result in unique_results
+        ]
+        
+        # Evaluate the misses over the shared x grid, split across the worker pool
+        misses = [i for i, result in enumerate(unique_results) if result is None]
+        loop = asyncio.get_running_loop()
+        slices = [misses[w::EVALUATION_WORKERS] for w in range(EVALUATION_WORKERS) if misses[w::EVALUATION_WORKERS]]
+        computed = await asyncio.gather(*[
+            loop.run_in_executor(
+                _pool,
+                evaluate_batch,
+                [unique_expressions[i] for i in indices],
+                request.variables,
+                request.x_range,
+                request.num_points,
+                request.format
             )
-            
-            # Create async task
-            task = evaluate_single_expression_async(expr_request)
-            tasks.append(task)
-        
-        # Execute all tasks in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results and handle exceptions
-        evaluation_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                # Create error response for failed expression
-                error_response = EvaluationResponse(
-                    expression=request.expressions[i],
-                    graph_data=None,
-                    evaluation_time_ms=0
-                )
-                evaluation_results.append(error_response)
-            else:
-                evaluation_results.append(result)
-        
-        total_time_ms = (time.time() - start_time) * 1000
-        
-        return BatchEvaluationResponse(
-            results=evaluation_results,
+            for indices in slices
+        ])
+        for indices, slice_results in zip(slices, computed):
+            for i, result in zip(indices, slice_results):
+                unique_results[i] = result
+        
+        # Store the new results, and failures under a short TTL
+        if cache:
+            await cache.mset(
+                {keys[i]: unique_results[i] for i in misses if not isinstance(unique_results[i], Exception)},
+                jittered_ttl(_CACHE_TTL, _CACHE_TTL_JITTER)
+            )
+            await cache.mset(
+                {keys[i]: negative_entry(str(unique_results[i])) for i in misses if isinstance(unique_results[i], Exception)},
+                _NEGATIVE_CACHE_TTL
+            )
+        
+        results = [None] * len(request.expressions)
+        for expression, result in zip(unique_expressions, unique_results):
+            for i in groups[expression]:
+                results[i] = result
+        
+        # A failed expression fails the batch with its own error, freshly raised or remembered
+        failure = next((result for result in results if isinstance(result, Exception)), None)
+        if failure is not None:
+            raise HTTPException(status_code=400, detail=f"Batch evaluation failed: {failure}")
+        
+        total_time_ms = (perf_counter_ns() - start_time) / 1e6
+        
+        return ModelORJSONResponse(BatchEvaluationResponse.model_construct(
+            results=results,
             total_expressions=len(request.expressions),
             total_evaluation_time_ms=total_time_ms
-        )
+        ))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch evaluation failed: {str(e)}")
 
-async def evaluate_single_expression_async(request: ExpressionRequest) -> EvaluationResponse:
+def evaluate_batch(expressions: List[str], variables: Dict[str, float],
+                   x_range: Tuple[float, float], num_points: int, layout: str = "aos") -> List[Any]:
+    """
+    Evaluate expressions that share one x grid and parameter set in a single batched pass.
+    Failures are returned in place of their response so one bad expression does not hide the rest.
+    Each response reports its share of the batch's evaluation time.
+    """
+    start_time = perf_counter_ns()
+    batch = get_evaluator().generate_batch_graph_data(expressions, x_range, num_points, variables, layout)
+    evaluation_time_ms = (perf_counter_ns() - start_time) / 1e6 / max(len(expressions), 1)
+    return [
+        graph_data if isinstance(graph_data, Exception) else evaluation_response(expression, graph_data, evaluation_time_ms)
+        for expression, graph_data in zip(expressions, batch)
+    ]
+
+async def evaluate_request_async(request: ExpressionRequest) -> EvaluationResponse:
+    """
+    Adapter that evaluates an already-validated ExpressionRequest.
+    """
+    return await evaluate_single_expression_async(
+        request.expression, request.variables, request.x_range, request.num_points
+    )
+
+async def evaluate_single_expression_async(expression: str, variables: Dict[str, float],
+                                           x_range: Tuple[float, float], num_points: int) -> EvaluationResponse:
     """
     Helper function to evaluate a single expression asynchronously.
+    Takes plain values so callers holding validated fields skip building a request model.
     """
+    cache_key = generate_cache_key(expression, variables, x_range, num_points=num_points)
+    cache = get_cache()
+    
+    # Check cache first; a remembered failure is reported as is, keeping its entry and TTL
+    cached_result = await cache.get(cache_key) if cache else None
+    
+    if is_negative_entry(cached_result):
+        raise HTTPException(status_code=400, detail=cached_result['error'])
+    if cached_result:
+        return cached_result
+    
     try:
-        # Check cache first
-        cache_key = generate_cache_key(request.expression, request.variables, request.x_range)
-        cache = get_cache()
-        cached_result = await cache.get(cache_key) if cache else None
-        
-        if cached_result:
-            return cached_result
-        
-        start_time = time.time()
+        start_time = perf_counter_ns()
         
-        # Generate graph data
-        graph_data = evaluator.generate_graph_data(
-            expression=request.expression,
-            x_range=request.x_range,
-            num_points=request.num_points,
-            params=request.variables
+        # Generate graph data on the worker pool
+        graph_data = await asyncio.get_running_loop().run_in_executor(
+            _pool,
+            lambda: get_evaluator().generate_graph_data(
+                expression=expression,
+                x_range=x_range,
+                num_points=num_points,
+                params=variables
+            )
         )
         
-        evaluation_time_ms = (time.time() - start_time) * 1000
+        evaluation_time_ms = (perf_counter_ns() - start_time) / 1e6
         
         # Create response
-        response = EvaluationResponse(
-            expression=request.expression,
-            graph_data=graph_data,
-            evaluation_time_ms=evaluation_time_ms
-        )
+        response = evaluation_response(expression, graph_data, evaluation_time_ms)
         
         # Cache the result
         if cache:
-            await cache.set(cache_key, response, settings.CACHE_TTL)
+            await cache.set(cache_key, response, jittered_ttl(_CACHE_TTL, _CACHE_TTL_JITTER))
         
         return response
         
     except Exception as e:
-        # Return a response with error information
-        return EvaluationResponse(
-            expression=request.expression,
-            graph_data=None,
-            evaluation_time_ms=0
-        )
+        # Remember the failure briefly so repeated bad input is not re-evaluated
+        if cache:
+            await cache.set(cache_key, negative_entry(str(e)), _NEGATIVE_CACHE_TTL)
+        
+        raise HTTPException(status_code=400, detail=str(e))
+
+def parameter_update_body(expression: str, variables: Dict[str, float], x_range: Tuple[float, float],
+                          layout: str, start_time: int) -> bytes:
+    """
+    Evaluate an /update-params request and encode its response body.
+    Runs on the worker pool, so neither the evaluation nor the serialization holds the event loop.
+    """
+    graph_data = get_evaluator().generate_graph_data(
+        expression=expression,
+        x_range=x_range,
+        num_points=1000,  # Default for parameter updates
+        params=variables,
+        layout=layout
+    )
+    evaluation_time_ms = (perf_counter_ns() - start_time) / 1e6
+    return render_model(evaluation_response(expression, graph_data, evaluation_time_ms))
 
 @router.post("/update-params", response_model=EvaluationResponse)
-async def update_parameters(request: ParameterUpdateRequest):
+async def update_parameters(request: ParameterUpdateRequest, http_request: Request):
     """
     Update parameters for an existing expression and get new graph data.
+    Clients that echo the previous ETag in If-None-Match get 304 when nothing changed.
     """
-    start_time = time.time()
+    start_time = perf_counter_ns()
     
     try:
         # Validate expression first
-        is_valid, error_msg = evaluator.parser.validate_expression(request.expression)
+        is_valid, error_msg = validate_expression(request.expression)
         if not is_valid:
             raise HTTPException(status_code=400, detail=f"Invalid expression: {error_msg}")
         
-        # Check cache first
-        cache_key = generate_cache_key(request.expression, request.variables, request.x_range)
+        # Unchanged inputs: the client already holds this graph
+        layout = request.format or "aos"
+        etag = parameter_etag(request.expression, request.variables, request.x_range, layout)
+        if http_request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        # Check cache first; hits are the encoded body, sent without re-serializing
+        cache_key = generate_cache_key(request.expression, request.variables, request.x_range,
+                                       layout=layout, num_points=1000, kind="bytes")
         cache = get_cache()
-        cached_result = await cache.get(cache_key) if cache else None
+        cached_body = await cache.get_response_bytes(cache_key) if cache else None
         
-        if cached_result:
-            return cached_result
+        if cached_body:
+            return Response(content=cached_body, media_type="application/json", headers={"ETag": etag})
         
-        # Generate graph data with new parameters
-        graph_data = evaluator.generate_graph_data(
-            expression=request.expression,
-            x_range=request.x_range,
-            num_points=1000,  # Default for parameter updates
-            params=request.variables
-        )
-        
-        evaluation_time_ms = (time.time() - start_time) * 1000
-        
-        # Create response
-        response = EvaluationResponse(
-            expression=request.expression,
-            graph_data=graph_data,
-            evaluation_time_ms=evaluation_time_ms
+        # Generate graph data with new parameters and encode it on the worker pool
+        body = await asyncio.get_running_loop().run_in_executor(
+            _pool,
+            parameter_update_body,
+            request.expression,
+            request.variables,
+            request.x_range,
+            layout,
+            start_time
         )
         
-        # Cache the result (shorter TTL for parameter updates)
+        # Cache the encoded body (shorter TTL for parameter updates)
         if cache:
-            await cache.set(cache_key, response, 300)  # 5 minutes
+            await cache.set(cache_key, body, jittered_ttl(300, _CACHE_TTL_JITTER))  # ~5 minutes
         
-        return response
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Parameter update failed: {str(e)}")
@@ -292,65 +506,62 @@ async def evaluate_parametric(request: ParametricRequest):
     """
     Evaluate parametric equations x(t), y(t) and generate graph data.
     """
-    start_time = time.time()
+    start_time = perf_counter_ns()
     
     try:
         # Evaluate parametric equations
-        x_values, y_values = evaluator.evaluate_parametric(
+        x_values, y_values = get_evaluator().evaluate_parametric(
             request.x_expression,
             request.y_expression,
             request.t_range,
             request.num_points,
-            request.variables
+            request.variables,
+            request_dtype(request)
         )
         
         # Create coordinate points
-        coordinates = []
-        valid_count = 0
-        for x, y in zip(x_values, y_values):
-            if not np.isnan(x) and not np.isnan(y) and not np.isinf(x) and not np.isinf(y):
-                coordinates.append({"x": float(x), "y": float(y)})
-                valid_count += 1
+        xs, ys = finite_points(x_values, y_values)
+        coordinates = coordinate_payload({"x": xs, "y": ys}, request.format)
+        valid_count = int(xs.size)
         
         # Calculate ranges
-        x_coords = [point["x"] for point in coordinates]
-        y_coords = [point["y"] for point in coordinates]
-        x_range = (min(x_coords), max(x_coords)) if x_coords else (0.0, 1.0)
-        y_range = (min(y_coords), max(y_coords)) if y_coords else (0.0, 1.0)
+        x_range = points_range(xs, (0.0, 1.0))
+        y_range = points_range(ys, (0.0, 1.0))
         
         # Create response
-        end_time = time.time()
-        
-        return EvaluationResponse(
-            expression=f"parametric: x={request.x_expression}, y={request.y_expression}",
-            graph_data=GraphDataResponse(
-                coordinates=coordinates,
-                total_points=request.num_points,
-                valid_points=valid_count,
-                x_range=x_range,
-                y_range=y_range
-            ),
-            evaluation_time_ms=(end_time - start_time) * 1000
-        )
+        end_time = perf_counter_ns()
+        graph_data = dict(coordinates, total_points=request.num_points, valid_points=valid_count,
+                          x_range=x_range, y_range=y_range)
+        
+        return ModelORJSONResponse(evaluation_response(
+            f"parametric: x={request.x_expression}, y={request.y_expression}",
+            graph_data,
+            (end_time - start_time) / 1e6
+        ))
         
     except Exception as e:
-        end_time = time.time()
+        end_time = perf_counter_ns()
         raise HTTPException(
             status_code=400, 
             detail=str(e),
-            headers={"X-Evaluation-Time-ms": str((end_time - start_time) * 1000)}
+            headers={"X-Evaluation-Time-ms": str((end_time - start_time) / 1e6)}
         )
 
-@router.post("/surface-3d", response_model=Evaluation3DResponse)
+@router.post("/surface-3d", response_model=Evaluation3DResponse)
 async def evaluate_3d_surface(request: Surface3DRequest):
     """
     Evaluate a 3D surface z = f(x, y) and generate graph data.
     """
-    start_time = time.time()
+    start_time = perf_counter_ns()
+    
+    if request.format == "grid":
+        return await surface_grid(request, start_time)
     
     try:
-        # Generate 3D surface data
-        coordinates, z_range = evaluator.evaluate_3d_surface(
+        # Generate 3D surface data on the worker pool
+        points, z_range = await asyncio.get_running_loop().run_in_executor(
+            _pool,
+            get_evaluator().surface_points,
             request.expression,
             request.x_range,
             request.y_range,
@@ -358,41 +569,118 @@ async def evaluate_3d_surface(request: Surface3DRequest):
             request.variables
         )
         
+        columns = {"x": points[:, 0], "y": points[:, 1], "z": points[:, 2]}
+        
         # Create response
-        end_time = time.time()
+        end_time = perf_counter_ns()
         
-        return Evaluation3DResponse(
+        return ModelORJSONResponse(Evaluation3DResponse.model_construct(
             expression=request.expression,
             graph_type="surface",
-            graph_data=GraphData3DResponse(
-                coordinates=[{"x": float(coord[0]), "y": float(coord[1]), "z": float(coord[2])} for coord in coordinates],
+            graph_data=GraphData3DResponse.model_construct(
+                **coordinate_payload(columns, request.format),
                 total_points=request.resolution * request.resolution,
-                valid_points=len([coord for coord in coordinates if not np.isnan(coord[2])]),
+                valid_points=len(points),
                 x_range=request.x_range,
                 y_range=request.y_range,
                 z_range=z_range
             ),
-            evaluation_time_ms=(end_time - start_time) * 1000
+            evaluation_time_ms=(end_time - start_time) / 1e6
+        ))
+        
+    except Exception as e:
+        end_time = perf_counter_ns()
+        raise HTTPException(
+            status_code=400, 
+            detail=f"3D surface evaluation failed: {str(e)}",
+            headers={"X-Evaluation-Time-ms": str((end_time - start_time) / 1e6)}
+        )
+
+async def surface_grid(request: Surface3DRequest, start_time: int):
+    """
+    Answer /surface-3d with only the z grid: x and y follow from the ranges and resolution,
+    so the payload is one float32 buffer instead of three filtered coordinate columns.
+    """
+    try:
+        _, _, Z = await asyncio.get_running_loop().run_in_executor(
+            _pool,
+            get_evaluator().evaluate_surface,
+            request.expression,
+            request.x_range,
+            request.y_range,
+            request.resolution,
+            request.variables
         )
+        # Count and range of the finite z in one pass; the filtered values themselves are never needed
+        valid_points, z_low, z_high = finite_summary(Z.reshape(-1))
+        z_range = (z_low, z_high)
+        
+        return ModelORJSONResponse(Evaluation3DResponse.model_construct(
+            expression=request.expression,
+            graph_type="surface",
+            graph_data=GraphData3DResponse.model_construct(
+                z_b64=float32_base64(Z),
+                total_points=request.resolution * request.resolution,
+                valid_points=valid_points,
+                x_range=request.x_range,
+                y_range=request.y_range,
+                z_range=z_range
+            ),
+            evaluation_time_ms=(perf_counter_ns() - start_time) / 1e6
+        ))
         
     except Exception as e:
-        end_time = time.time()
+        end_time = perf_counter_ns()
         raise HTTPException(
             status_code=400, 
             detail=f"3D surface evaluation failed: {str(e)}",
-            headers={"X-Evaluation-Time-ms": str((end_time - start_time) * 1000)}
+            headers={"X-Evaluation-Time-ms": str((end_time - start_time) / 1e6)}
         )
 
+@router.post("/surface-3d/stream")
+async def stream_3d_surface(request: Surface3DRequest):
+    """
+    Stream a 3D surface z = f(x, y) as NDJSON: a header line describing the grid, then one
+    base64 float32 line of z values per grid row, computed as the row is sent.
+    """
+    try:
+        kernel = compile_kernel(get_evaluator().parser.preprocess_expression(request.expression))
+        require_bound(kernel, ('x', 'y'), request.variables)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"3D surface evaluation failed: {str(e)}")
+    
+    x_values = linspace_grid(request.x_range[0], request.x_range[1], request.resolution)
+    y_values = linspace_grid(request.y_range[0], request.y_range[1], request.resolution)
+    
+    async def lines():
+        yield orjson.dumps({
+            "expression": request.expression,
+            "x_range": request.x_range,
+            "y_range": request.y_range,
+            "resolution": request.resolution,
+            "dtype": "float32"
+        }) + b"\n"
+        for row, y in enumerate(y_values.tolist()):
+            z_row = kernel({'x': x_values, 'y': y}, request.variables)
+            if np.shape(z_row) != x_values.shape:
+                z_row = np.broadcast_to(z_row, x_values.shape)
+            z_row = nan_invalid(z_row)
+            yield orjson.dumps({"row": row, "z": float32_base64(z_row)}) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.post("/parametric-3d", response_model=Evaluation3DResponse)
 async def evaluate_3d_parametric(request: Parametric3DRequest):
     """
     Evaluate 3D parametric equations x(u, v), y(u, v), z(u, v) and generate graph data.
     """
-    start_time = time.time()
+    start_time = perf_counter_ns()
     
     try:
-        # Generate 3D parametric surface data
-        coordinates, z_range = evaluator.evaluate_3d_parametric(
+        # Generate 3D parametric surface data on the worker pool
+        points, z_range = await asyncio.get_running_loop().run_in_executor(
+            _pool,
+            get_evaluator().parametric_surface_points,
             request.x_expression,
             request.y_expression,
             request.z_expression,
@@ -402,35 +690,48 @@ async def evaluate_3d_parametric(request: Parametric3DRequest):
             request.variables
         )
         
+        columns = {"x": points[:, 0], "y": points[:, 1], "z": points[:, 2]}
+        
         # Create response
-        end_time = time.time()
+        end_time = perf_counter_ns()
         
-        return Evaluation3DResponse(
+        return ModelORJSONResponse(Evaluation3DResponse.model_construct(
             expression=f"parametric: x={request.x_expression}, y={request.y_expression}, z={request.z_expression}",
             graph_type="parametric",
-            graph_data=GraphData3DResponse(
-                coordinates=[{"x": float(coord[0]), "y": float(coord[1]), "z": float(coord[2])} for coord in coordinates],
+            graph_data=GraphData3DResponse.model_construct(
+                **coordinate_payload(columns, request.format),
                 total_points=request.resolution * request.resolution,
-                valid_points=len([coord for coord in coordinates if all(not np.isnan(c) for c in coord)]),
+                valid_points=len(points),
                 x_range=request.u_range,
                 y_range=request.v_range,
                 z_range=z_range
             ),
-            evaluation_time_ms=(end_time - start_time) * 1000
-        )
+            evaluation_time_ms=(end_time - start_time) / 1e6
+        ))
         
     except Exception as e:
-        end_time = time.time()
+        end_time = perf_counter_ns()
         raise HTTPException(
             status_code=400, 
             detail=f"3D parametric evaluation failed: {str(e)}",
-            headers={"X-Evaluation-Time-ms": str((end_time - start_time) * 1000)}
+            headers={"X-Evaluation-Time-ms": str((end_time - start_time) / 1e6)}
         )
 
+@router.post("/cache/clear")
+async def clear_parse_cache():
+    """
+    Clear the memoized parse, validation and compiled-expression caches.
+    """
+    classify_expression.cache_clear()
+    validate_expression.cache_clear()
+    clear_kernel_cache()
+    get_evaluator().clear_caches()
+    return {"status": "cleared"}
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint.
     """
-    return {"status": "healthy", "service": "grapher-api"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
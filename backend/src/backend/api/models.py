@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Union, Tuple, Any
+from typing import List, Dict, Optional, Union, Tuple, Any, Literal
 import numpy as np
 
 class CoordinatePoint(BaseModel):
@@ -18,6 +18,8 @@ class ExpressionRequest(BaseModel):
     num_points: Optional[int] = Field(default=1000, ge=10, le=10000, description="Number of points to generate")
     t_range: Optional[Tuple[float, float]] = Field(default=(0.0, 6.283185307179586), description="Parameter range for parametric equations")
     expression_format: Optional[str] = Field(default="auto", description="Format: 'auto', 'explicit', 'implicit', 'parametric'")
+    format: Optional[Literal["aos", "soa", "binary"]] = Field(default="aos", description="Coordinate layout: 'aos' (list of points), 'soa' (parallel x/y arrays) or 'binary' (base64 float32 x/y buffers)")
+    high_precision: Optional[bool] = Field(default=True, description="Sample and evaluate explicit functions in float64; false uses float32, enough for on-screen rendering")
 
 class ParseRequest(BaseModel):
     expression: str = Field(..., min_length=1, max_length=1000, description="Mathematical expression to parse")
@@ -27,6 +29,7 @@ class BatchExpressionRequest(BaseModel):
     variables: Dict[str, float] = Field(default_factory=dict, description="Common variable values")
     x_range: Optional[Tuple[float, float]] = Field(default=(-30.0, 30.0), description="X coordinate range for evaluation")
     num_points: Optional[int] = Field(default=1000, ge=10, le=10000, description="Number of points to generate")
+    format: Optional[Literal["aos", "soa"]] = Field(default="aos", description="Coordinate layout: 'aos' (list of points) or 'soa' (parallel x/y arrays)")
 
 class ParseResponse(BaseModel):
     is_valid: bool
@@ -39,7 +42,11 @@ class ParseResponse(BaseModel):
     classification: Optional[Dict[str, Any]] = None
 
 class GraphDataResponse(BaseModel):
-    coordinates: List[CoordinatePoint]
+    coordinates: List[CoordinatePoint] = Field(default_factory=list)
+    x: Optional[List[float]] = None
+    y: Optional[List[float]] = None
+    x_b64: Optional[str] = None
+    y_b64: Optional[str] = None
     total_points: int
     valid_points: int
     x_range: Tuple[float, float]
@@ -59,6 +66,7 @@ class ParameterUpdateRequest(BaseModel):
     expression: str
     variables: Dict[str, float]
     x_range: Optional[Tuple[float, float]] = Field(default=(-30.0, 30.0))
+    format: Optional[Literal["aos", "soa"]] = Field(default="aos", description="Coordinate layout: 'aos' (list of points) or 'soa' (parallel x/y arrays)")
 
 class ParametricRequest(BaseModel):
     x_expression: str = Field(..., description="X component of parametric equation x(t)")
@@ -66,6 +74,8 @@ class ParametricRequest(BaseModel):
     variables: Dict[str, float] = Field(default_factory=dict, description="Parameter values")
     t_range: Optional[Tuple[float, float]] = Field(default=(0.0, 6.283185307179586), description="Parameter t range")
     num_points: Optional[int] = Field(default=1000, ge=10, le=10000, description="Number of points to generate")
+    format: Optional[Literal["aos", "soa", "binary"]] = Field(default="aos", description="Coordinate layout: 'aos' (list of points), 'soa' (parallel x/y arrays) or 'binary' (base64 float32 x/y buffers)")
+    high_precision: Optional[bool] = Field(default=True, description="Sample t and evaluate in float64; false uses float32, enough for on-screen rendering")
 
 # 3D Graphing Models
 class Surface3DRequest(BaseModel):
@@ -74,6 +84,7 @@ class Surface3DRequest(BaseModel):
     x_range: Optional[Tuple[float, float]] = Field(default=(-10.0, 10.0), description="X coordinate range")
     y_range: Optional[Tuple[float, float]] = Field(default=(-10.0, 10.0), description="Y coordinate range")
     resolution: Optional[int] = Field(default=50, ge=10, le=200, description="Grid resolution for surface")
+    format: Optional[Literal["aos", "soa", "binary", "grid"]] = Field(default="aos", description="Coordinate layout: 'aos' (list of points), 'soa' (parallel x/y/z arrays), 'binary' (base64 float32 x/y/z buffers) or 'grid' (base64 float32 z over the full resolution x resolution grid, row per y, NaN where undefined)")
 
 class Parametric3DRequest(BaseModel):
     x_expression: str = Field(..., description="X component x(u, v)")
@@ -83,9 +94,16 @@ class Parametric3DRequest(BaseModel):
     v_range: Optional[Tuple[float, float]] = Field(default=(0.0, 6.283185307179586), description="Parameter v range")
     resolution: Optional[int] = Field(default=50, ge=10, le=200, description="Grid resolution for parametric surface")
     variables: Dict[str, float] = Field(default_factory=dict, description="Additional parameter values")
+    format: Optional[Literal["aos", "soa", "binary"]] = Field(default="aos", description="Coordinate layout: 'aos' (list of points), 'soa' (parallel x/y/z arrays) or 'binary' (base64 float32 x/y/z buffers)")
 
 class GraphData3DResponse(BaseModel):
-    coordinates: List[CoordinatePoint3D]
+    coordinates: List[CoordinatePoint3D] = Field(default_factory=list)
+    x: Optional[List[float]] = None
+    y: Optional[List[float]] = None
+    z: Optional[List[float]] = None
+    x_b64: Optional[str] = None
+    y_b64: Optional[str] = None
+    z_b64: Optional[str] = None
     total_points: int
     valid_points: int
     x_range: Tuple[float, float]
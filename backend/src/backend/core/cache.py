@@ -1,46 +1,95 @@
-import json
 import hashlib
-from typing import Optional, Dict, Any
+import random
+from typing import Optional, Dict, Any, List, Tuple
 import asyncio
-from datetime import datetime, timedelta
+from time import monotonic
 import threading
 
 # Simple in-memory cache for development
 # In production, replace with Redis or similar
 class MemoryCache:
+    # Writes between sweeps of expired entries
+    SWEEP_INTERVAL = 256
+    
     def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._lock = threading.Lock()  # Use threading lock for compatibility
+        # key -> (monotonic expiry, value); entries are replaced whole, never mutated
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()  # Serializes writers only; reads rely on atomic dict access
+        self._writes = 0
         
+    def _expire(self, key: str, entry: Tuple[float, Any]) -> None:
+        """Drop an expired entry unless a writer has replaced it since it was read"""
+        with self._lock:
+            if self._cache.get(key) is entry:
+                del self._cache[key]
+    
+    def _sweep(self, now: float) -> None:
+        """Drop every expired entry; called with the lock held"""
+        self._writes = 0
+        expired = [key for key, (expires, _) in self._cache.items() if expires <= now]
+        for key in expired:
+            del self._cache[key]
+    
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache if it exists and hasn't expired"""
-        with self._lock:
-            if key in self._cache:
-                item = self._cache[key]
-                if datetime.now() < item['expires']:
-                    return item['value']
-                else:
-                    del self._cache[key]
+        entry = self._cache.get(key)
+        if entry is None:
             return None
+        if entry[0] > monotonic():
+            return entry[1]
+        self._expire(key, entry)
+        return None
+    
+    async def get_response_bytes(self, key: str) -> Optional[bytes]:
+        """Get a cached, already-encoded response body; entries holding other values are misses"""
+        value = await self.get(key)
+        return value if isinstance(value, bytes) else None
     
     async def set(self, key: str, value: Any, ttl: int = 3600) -> None:
         """Set value in cache with TTL"""
+        now = monotonic()
         with self._lock:
-            self._cache[key] = {
-                'value': value,
-                'expires': datetime.now() + timedelta(seconds=ttl)
-            }
+            self._cache[key] = (now + ttl, value)
+            self._writes += 1
+            if self._writes >= self.SWEEP_INTERVAL:
+                self._sweep(now)
+    
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values without locking; missing or expired keys yield None"""
+        now = monotonic()
+        results = []
+        for key in keys:
+            entry = self._cache.get(key)
+            if entry is None:
+                results.append(None)
+            elif entry[0] > now:
+                results.append(entry[1])
+            else:
+                self._expire(key, entry)
+                results.append(None)
+        return results
+    
+    async def mset(self, items: Dict[str, Any], ttl: int = 3600) -> None:
+        """Set several values sharing one TTL in one locked pass"""
+        now = monotonic()
+        expires = now + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._cache[key] = (expires, value)
+            self._writes += len(items)
+            if self._writes >= self.SWEEP_INTERVAL:
+                self._sweep(now)
     
     async def delete(self, key: str) -> None:
         """Delete key from cache"""
         with self._lock:
-            if key in self._cache:
-                del self._cache[key]
+            self._cache.pop(key, None)
     
     async def clear(self) -> None:
         """Clear all cache entries"""
         with self._lock:
             self._cache.clear()
+            self._writes = 0
 
 # Global cache instance
 cache: Optional[MemoryCache] = None
@@ -54,12 +103,30 @@ def get_cache() -> Optional[MemoryCache]:
     """Get the global cache instance"""
     return cache
 
-def generate_cache_key(expression: str, params: Optional[Dict[str, float]] = None, x_range: Optional[tuple] = None) -> str:
+def jittered_ttl(ttl: int, jitter: float = 0.1) -> int:
+    """Spread a TTL by +/- jitter so entries written together do not expire together"""
+    return max(1, int(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+def negative_entry(error: str) -> Dict[str, str]:
+    """Cache value recording that an evaluation failed"""
+    return {'error': error}
+
+def is_negative_entry(value: Any) -> bool:
+    """Check whether a cached value is a recorded failure"""
+    return isinstance(value, dict) and 'error' in value
+
+def generate_cache_key(expression: str, params: Optional[Dict[str, float]] = None, x_range: Optional[tuple] = None,
+                       layout: Optional[str] = None, num_points: Optional[int] = None,
+                       kind: Optional[str] = None) -> str:
     """Generate a unique cache key for expression evaluation"""
-    key_data = {
-        'expression': expression,
-        'params': params or {},
-        'x_range': x_range or (-30, 30)
-    }
-    key_str = json.dumps(key_data, sort_keys=True)
-    return hashlib.md5(key_str.encode()).hexdigest()
\ No newline at end of file
+    key_str = f"{expression!r}|{sorted(params.items()) if params else []}|{tuple(x_range or (-30, 30))}"
+    # Entries holding something other than graph data dicts (e.g. encoded response bodies) get their own namespace
+    if kind:
+        key_str = f"{kind}:{key_str}"
+    # Non-default layouts are cached separately
+    if layout and layout != 'aos':
+        key_str += f"|layout={layout}"
+    # Results sampled at different resolutions must not share an entry
+    if num_points is not None:
+        key_str += f"|n={num_points}"
+    return hashlib.blake2b(key_str.encode(), digest_size=16).hexdigest()
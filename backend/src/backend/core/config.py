@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     # Cache Settings
     REDIS_URL: Optional[str] = None
     CACHE_TTL: int = 3600  # 1 hour default
+    NEGATIVE_CACHE_TTL: int = 30  # failed evaluations
+    CACHE_TTL_JITTER: float = 0.1  # +/- fraction applied to every TTL
     
     # Security Settings
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
@@ -26,6 +28,7 @@ class Settings(BaseSettings):
     MAX_BATCH_SIZE: int = 100
     COMPUTATION_TIMEOUT: float = 5.0  # seconds
     MAX_POINTS_PER_GRAPH: int = 10000
+    NUMEXPR_THREADS: Optional[int] = None  # None uses every CPU available to the process
     
 model_config = ConfigDict(env_file=".env", env_file_encoding='utf-8')
 
@@ -1,13 +1,35 @@
 import ast
 import operator
+import os
+from backend.core.config import settings
+
+def available_cpus() -> int:
+    """CPUs this process may run on, honoring affinity masks and container CPU sets"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # sched_getaffinity is Linux-only
+        return os.cpu_count() or 1
+
+# numexpr sizes its thread pool from the environment when it is first imported
+NUMEXPR_THREADS = settings.NUMEXPR_THREADS or available_cpus()
+os.environ.setdefault('NUMEXPR_MAX_THREADS', str(NUMEXPR_THREADS))
+
 import numpy as np
 import numexpr as ne
-from typing import Dict, List, Set, Tuple, Any, Optional, Union
+from typing import Callable, Dict, List, NamedTuple, Set, Tuple, Any, Optional, Union
 import re
 import math
+import threading
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache, partial
 from scipy import optimize
 from scipy.ndimage import uniform_filter1d
 
+try:
+    import numba
+except ImportError:  # Optional JIT tier; numexpr evaluates every expression without it
+    numba = None
+
 # Supported mathematical functions and constants
 MATH_FUNCTIONS = {
     'sin': np.sin,
@@ -37,6 +59,12 @@ MATH_CONSTANTS = {
     'tau': 2 * np.pi,
 }
 
+# Names that never count as variables
+RESERVED_NAMES = frozenset(MATH_FUNCTIONS) | frozenset(MATH_CONSTANTS)
+
+# Plotting axes and the parametric parameter; every other variable is a user parameter
+AXIS_NAMES = frozenset({'x', 'y', 't'})
+
 OPERATORS = {
     ast.Add: operator.add,
     ast.Sub: operator.sub,
@@ -49,9 +77,477 @@ OPERATORS = {
     ast.BitXor: operator.pow,  # Treat ^ as exponentiation
 }
 
+def _numexpr_supports(function_name: str) -> bool:
+    """Check whether the installed numexpr VM implements a function natively"""
+    try:
+        ne.NumExpr(f'{function_name}(x)', signature=[('x', np.float64)])
+        return True
+    except Exception:
+        return False
+
+# Functions that can run on the numexpr fast path; the rest fall back to NumPy
+NUMEXPR_FUNCTIONS = frozenset(name for name in MATH_FUNCTIONS if _numexpr_supports(name))
+
+# Size numexpr's pool once and start its threads now rather than on the first request
+ne.set_num_threads(min(NUMEXPR_THREADS, ne.MAX_THREADS))
+ne.evaluate('x + 1', local_dict={'x': np.zeros(1 << 16)})
+
+def evaluate_ast(node: ast.AST, values: Dict[str, Any]) -> Any:
+    """Vectorized NumPy interpreter for the arithmetic subset numexpr cannot compile"""
+    if isinstance(node, ast.Expression):
+        return evaluate_ast(node.body, values)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return np.float64(node.value)
+    if isinstance(node, ast.Name):
+        return values[node.id]
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](evaluate_ast(node.left, values), evaluate_ast(node.right, values))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](evaluate_ast(node.operand, values))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in MATH_FUNCTIONS:
+        return MATH_FUNCTIONS[node.func.id](*(evaluate_ast(arg, values) for arg in node.args))
+    raise ValueError(f"Unsupported expression construct: {type(node).__name__}")
+
+# Constructs rejected anywhere in an expression, checked in this order
+UNSUPPORTED_PATTERNS = (
+    r'__.*__',  # dunder methods
+    r'import\s+',
+    r'exec\s*\(',
+    r'eval\s*\(',
+    r'open\s*\(',
+    r'file\s*\(',
+    r'input\s*\(',
+    r'globals\s*\(',
+    r'locals\s*\(',
+    r'vars\s*\(',
+    r'dir\s*\(',
+    r'\+\+',  # increment operator
+    r'--',  # decrement operator
+)
+_UNSUPPORTED_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in UNSUPPORTED_PATTERNS), re.IGNORECASE)
+_UNSUPPORTED_REGEXES = tuple((pattern, re.compile(pattern, re.IGNORECASE)) for pattern in UNSUPPORTED_PATTERNS)
+
+# Function names add_implicit_multiplication keeps intact, in the order its rules apply
+IMPLICIT_FUNCTION_NAMES = (
+    'sin', 'cos', 'tan', 'log', 'exp', 'sqrt', 'abs', 'asin', 'acos', 'atan',
+    'sinh', 'cosh', 'tanh', 'log10', 'log2', 'floor', 'ceil', 'round', 'sign'
+)
+
+# Implicit multiplication rewrite rules, compiled once per process. There are over a
+# thousand, far more than re's internal pattern cache holds, so re.sub would recompile them
+# sinx -> sin(x)
+_FUNCTION_ARGUMENT_RULES = tuple(
+    (func, re.compile(rf'{func}([a-zA-Z])(?!\w)'), rf'{func}(\1)') for func in IMPLICIT_FUNCTION_NAMES
+)
+# 2sin(x) -> 2*sin(x), 2sin -> 2*sin
+_NUMBER_FUNCTION_RULES = tuple(
+    (func, (
+        (re.compile(rf'(\d+){func}\s*\('), rf'\1*{func}('),
+        (re.compile(rf'(\d+){func}(?!\w)'), rf'\1*{func}'),
+    ))
+    for func in IMPLICIT_FUNCTION_NAMES
+)
+# xsin(x) -> x*sin(x), xcosy -> x*cos(y), xsin -> x*sin
+_VARIABLE_FUNCTION_RULES = tuple(
+    (func, (
+        (re.compile(rf'([a-zA-Z]){func}\s*\('), rf'\1*{func}('),
+        (re.compile(rf'([a-zA-Z]){func}([a-zA-Z])(?!\w)'), rf'\1*{func}(\2)'),
+        (re.compile(rf'([a-zA-Z]){func}(?!\w)(?!\()'), rf'\1*{func}'),
+    ))
+    for func in IMPLICIT_FUNCTION_NAMES
+)
+# sin(x)cosy -> sin(x)*cos(y), sin(x)cos( -> sin(x)*cos(: one alternation over every name
+# pair, tried in IMPLICIT_FUNCTION_NAMES order as the per-pair rules were
+_FUNCTION_NAME_ALTERNATION = '|'.join(IMPLICIT_FUNCTION_NAMES)
+_FUNCTION_PRODUCT_RE = re.compile(rf'\)({_FUNCTION_NAME_ALTERNATION})(?:([a-zA-Z])(?!\w)|\s*\()')
+_FUNCTION_CALL_OPEN_RE = re.compile(rf'(?:{_FUNCTION_NAME_ALTERNATION})\(')
+
+def _function_products(text: str) -> str:
+    """Put '*' between a function call's ')' and a function name directly after it, in one pass"""
+    def replace(match: 're.Match[str]') -> str:
+        # The ')' must close f(...) with no other ')' between the two, as in f\([^)]*\)
+        close = match.start()
+        if not _FUNCTION_CALL_OPEN_RE.search(text, text.rfind(')', 0, close) + 1, close):
+            return match.group()
+        func, argument = match.group(1), match.group(2)
+        return f')*{func}({argument})' if argument else f')*{func}('
+    return _FUNCTION_PRODUCT_RE.sub(replace, text)
+# sin( is hidden behind a placeholder while x( -> x*( is applied
+_FUNCTION_CALL_RULES = tuple(
+    (func, re.compile(rf'\b{func}\s*\('), f'FUNC_{func}_CALL_') for func in IMPLICIT_FUNCTION_NAMES
+)
+# One pass placing '*' at every product boundary that needs no function-name context:
+# 2x -> 2*x and x2 -> x*2 at digit/letter boundaries, and (x+1)2, (x+1)y, (x+1)(y+2)
+# after a ')' followed by a digit, a letter or (spaces and) '('
+_PRODUCT_BOUNDARY_RE = re.compile(
+    r'(?<=\d)(?=[a-zA-Z])|(?<=[a-zA-Z])(?=\d)|(?<=\))\s*(?=\()|(?<=\))(?=\d|[a-zA-Z])'
+)
+# 2(x+1) -> 2*(x+1) and x(y+1) -> x*(y+1), run while function calls are hidden
+_OPERAND_PAREN_RE = re.compile(r'([a-zA-Z\d])\s*\(')
+_LETTER_PAIR_RE = re.compile(r'(?<!\w)([a-zA-Z])([a-zA-Z])(?!\w)')
+# x(t) or y(t): the parametric form parse_expression_type looks for
+_PARAMETRIC_CALL_RE = re.compile(r'[xy]\s*\(')
+
+@lru_cache(maxsize=256)
+def _implicit_rules_for(present: frozenset) -> Tuple[tuple, tuple, tuple]:
+    """
+    The function-name rules for the names present in an expression, in rule order:
+    argument rules, number/variable-function rules and call rules.
+    No rewrite joins characters, so a name absent from the input never appears later.
+    """
+    return (
+        tuple((regex, replacement) for func, regex, replacement in _FUNCTION_ARGUMENT_RULES if func in present),
+        tuple(
+            rule
+            for rules in (_NUMBER_FUNCTION_RULES, _VARIABLE_FUNCTION_RULES)
+            for func, func_rules in rules if func in present
+            for rule in func_rules
+        ),
+        tuple(rule for rule in _FUNCTION_CALL_RULES if rule[0] in present),
+    )
+
+# AST node types a function expression may contain
+ALLOWED_NODES = frozenset({
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant,
+    ast.Name, ast.Load, ast.Call, ast.Subscript,
+    ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.Is, ast.IsNot, ast.In, ast.NotIn,
+    ast.BoolOp, ast.And, ast.Or, ast.Not,
+    ast.IfExp, ast.Attribute, ast.BitXor, ast.Pow,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod,
+    ast.UAdd, ast.USub, ast.FloorDiv,
+})
+
+def unsupported_construct(expression: str) -> Optional[str]:
+    """Return the first unsupported pattern found in the expression, or None"""
+    # One combined scan clears the common case; the ordered check only runs on a hit
+    if _UNSUPPORTED_RE.search(expression) is None:
+        return None
+    for pattern, regex in _UNSUPPORTED_REGEXES:
+        if regex.search(expression):
+            return pattern
+    return None
+
+def token_replacer(mapping: Dict[str, str]) -> Callable[[str], str]:
+    """
+    Replace literal tokens in one scan: a compiled alternation (longest token first)
+    dispatching to the mapping. Matches applying each entry in turn when no replacement
+    contains a token.
+    """
+    tokens = sorted(mapping, key=len, reverse=True)
+    regex = re.compile('|'.join(re.escape(token) for token in tokens))
+    return partial(regex.sub, lambda match: mapping[match.group()])
+
+def all_finite(values: np.ndarray) -> bool:
+    """
+    Whether every value is finite, decided by one summing pass with no mask allocated:
+    any NaN or infinity makes the sum non-finite. A sum that overflows falls back to the
+    exact element-wise check.
+    """
+    with np.errstate(over='ignore', invalid='ignore'):
+        if math.isfinite(values.sum()):
+            return True
+    return bool(np.isfinite(values).all())
+
+def nan_invalid(values: Any, owned: bool = False) -> np.ndarray:
+    """
+    Replace infinities with NaN in place. Fully finite float input is returned untouched;
+    otherwise arrays the caller may not own (read-only grids, views, broadcasts) are copied
+    first, so shared inputs are never written through. Callers pass owned=True for writable
+    views into a result they just created, which are then cleared without the copy. The
+    mask lives in finite_mask's per-thread buffer, so the only allocation is that copy.
+    """
+    if np.ndim(values) == 0:
+        # Constant expressions evaluate to a 0-d result; there is no mask to write through
+        values = np.asarray(values)
+        return values if np.isfinite(values) else np.full((), np.nan, dtype=values.dtype)
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(np.float64)
+    if all_finite(values):
+        return values
+    if not (values.flags.writeable and (owned or values.flags.owndata)):
+        values = values.copy()
+    invalid = finite_mask(values)
+    np.logical_not(invalid, out=invalid)
+    np.copyto(values, np.nan, where=invalid)
+    return values
+
+@lru_cache(maxsize=1024)
+def parse_tree(expression: str) -> ast.Expression:
+    """Parse an expression once; the cached tree is shared and must not be mutated"""
+    return ast.parse(expression, mode='eval')
+
+# Node types the NumPy fallback can evaluate, besides the operators in OPERATORS
+_FALLBACK_NODES = frozenset({ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load, ast.Call})
+
+class _FallbackSource(ast.NodeTransformer):
+    """Bind numeric literals to float64 names and read ^ as power, matching evaluate_ast"""
+    
+    def __init__(self):
+        self.constants: Dict[str, Any] = {}
+        # Equal literals share one name, so repeated subexpressions stay identical
+        self._names: Dict[float, str] = {}
+    
+    def visit_Constant(self, node: ast.Constant) -> ast.Name:
+        value = float(node.value)
+        name = self._names.get(value)
+        if name is None:
+            name = self._names[value] = f'_k{len(self.constants)}'
+            self.constants[name] = np.float64(value)
+        return ast.Name(id=name, ctx=ast.Load())
+    
+    def visit_BinOp(self, node: ast.BinOp) -> ast.BinOp:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.BitXor):
+            node.op = ast.Pow()
+        return node
+
+_COMPOUND_NODES = (ast.BinOp, ast.UnaryOp, ast.Call)
+
+class _SharedSubexpressions(ast.NodeTransformer):
+    """
+    Common subexpression elimination: every operation occurring more than once is
+    computed once into a local (_c0, _c1, ...), innermost first, and read back by name
+    """
+    
+    def __init__(self, body: ast.AST):
+        self.counts = Counter(ast.dump(node) for node in ast.walk(body) if isinstance(node, _COMPOUND_NODES))
+        self.bound: Dict[str, str] = {}
+        self.assignments: List[str] = []
+    
+    def visit(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, _COMPOUND_NODES):
+            return node
+        key = ast.dump(node)
+        if key in self.bound:
+            return ast.Name(id=self.bound[key], ctx=ast.Load())
+        self.generic_visit(node)
+        if self.counts[key] < 2:
+            return node
+        name = self.bound[key] = f'_c{len(self.bound)}'
+        self.assignments.append(f'{name} = {ast.unparse(node)}')
+        return ast.Name(id=name, ctx=ast.Load())
+
+def compile_fallback(expression: str, names: Tuple[str, ...]) -> Optional[Callable[..., Any]]:
+    """
+    Compile an expression in evaluate_ast's arithmetic subset to a Python function taking
+    `names` positionally, or None when it falls outside that subset. Arguments bind as fast
+    locals, so calls build no namespace dict; functions and literals are its globals.
+    Subexpressions repeated in the expression, like x**2 in sin(x**2) + cos(x**2), are
+    evaluated once.
+    """
+    for node in ast.walk(parse_tree(expression)):
+        node_type = type(node)
+        if node_type in OPERATORS:
+            continue
+        if node_type not in _FALLBACK_NODES:
+            return None
+        if node_type is ast.Constant and not isinstance(node.value, (int, float)):
+            return None
+        if node_type is ast.Name and node.id.startswith(('_k', '_c')):
+            return None
+        if node_type is ast.Call and (node.keywords or not isinstance(node.func, ast.Name)
+                                      or node.func.id not in MATH_FUNCTIONS):
+            return None
+    source = _FallbackSource()
+    body = source.visit(ast.parse(expression, mode='eval')).body
+    namespace = {'__builtins__': {}, **MATH_FUNCTIONS, **source.constants}
+    shared = _SharedSubexpressions(body)
+    body = shared.visit(body)
+    if shared.assignments:
+        # Shared results need local assignments, so this is a def rather than a lambda
+        statements = ''.join(f'    {assignment}\n' for assignment in shared.assignments)
+        exec(f"def _expression({', '.join(names)}):\n{statements}    return {ast.unparse(body)}\n", namespace)
+        return namespace.pop('_expression')
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in names],
+                              kwonlyargs=[], kw_defaults=[], defaults=[])
+    tree = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=arguments, body=body)))
+    return eval(compile(tree, '<expression>', 'eval'), namespace)
+
+# Highest degree evaluated by Horner's rule; longer polynomials stay on numexpr
+MAX_POLYNOMIAL_DEGREE = 8
+
+def polynomial_coefficients(node: ast.AST, name: str) -> Optional[np.ndarray]:
+    """
+    Ascending coefficients when node is a polynomial in `name` with literal coefficients
+    (e.g. 3*x**2 - x/2 + 1), else None. Other names are not folded in, since params and
+    constants are only bound at call time.
+    """
+    node_type = type(node)
+    if node_type is ast.Expression:
+        return polynomial_coefficients(node.body, name)
+    if node_type is ast.Constant:
+        if type(node.value) in (int, float):
+            return np.array([float(node.value)])
+        return None
+    if node_type is ast.Name:
+        return np.array([0.0, 1.0]) if node.id == name else None
+    if node_type is ast.UnaryOp and type(node.op) in (ast.UAdd, ast.USub):
+        operand = polynomial_coefficients(node.operand, name)
+        if operand is None or type(node.op) is ast.UAdd:
+            return operand
+        return -operand
+    if node_type is not ast.BinOp:
+        return None
+    
+    op_type = type(node.op)
+    left = polynomial_coefficients(node.left, name)
+    if left is None:
+        return None
+    if op_type is ast.Pow:
+        exponent = node.right
+        if not (type(exponent) is ast.Constant and type(exponent.value) is int
+                and 0 <= exponent.value * (left.size - 1) <= MAX_POLYNOMIAL_DEGREE):
+            return None
+        result = np.array([1.0])
+        for _ in range(exponent.value):
+            result = np.convolve(result, left)
+        return result
+    right = polynomial_coefficients(node.right, name)
+    if right is None:
+        return None
+    if op_type in (ast.Add, ast.Sub):
+        result = np.zeros(max(left.size, right.size))
+        result[:left.size] += left
+        if op_type is ast.Add:
+            result[:right.size] += right
+        else:
+            result[:right.size] -= right
+        return result
+    if op_type is ast.Mult and left.size + right.size - 2 <= MAX_POLYNOMIAL_DEGREE:
+        return np.convolve(left, right)
+    if op_type is ast.Div and right.size == 1 and right[0] != 0:
+        return left / right[0]
+    return None
+
+# Functions whose value is finite wherever their argument is
+FINITE_FUNCTIONS = frozenset({'sin', 'cos', 'atan', 'tanh', 'abs', 'floor', 'ceil', 'round', 'sign'})
+
+# Node types that keep finite inputs finite; calls additionally need a FINITE_FUNCTIONS name
+FINITE_NODES = frozenset({
+    ast.Expression, ast.Load, ast.Name, ast.Constant, ast.Call,
+    ast.UnaryOp, ast.UAdd, ast.USub, ast.BinOp, ast.Add, ast.Sub, ast.Mult,
+})
+
+class ExpressionFacts(NamedTuple):
+    """Everything validation and compilation need from one walk of an expression tree"""
+    unsupported: Optional[str]  # first disallowed node type, or None
+    variables: frozenset  # names other than math functions and constants
+    arguments: frozenset  # every name not called as a function, constants included
+    numexpr_safe: bool  # every call is to a function numexpr implements
+    finite: bool  # finite inputs always give finite results (product overflow aside)
+
+class Classification(NamedTuple):
+    """An expression's classification, immutable so one instance can be memoized and shared"""
+    original_expression: str
+    processed_expression: str
+    type: str
+    variables: Tuple[str, ...]
+    is_valid: bool
+    error: Optional[str]
+    primary_variable: Optional[str]
+    parameters: Tuple[str, ...]
+    equation_parts: Optional[Tuple[str, str]] = None  # (left, right) of implicit equations
+    is_numexpr_safe: Optional[bool] = None  # reported for explicit expressions only
+    
+    def to_dict(self, include_parts: bool = True) -> Dict[str, Any]:
+        """
+        The parse_and_classify_expression dict, with only the keys this kind of result carries;
+        the equation_parts dict is built only when include_parts asks for it
+        """
+        result = {
+            'original_expression': self.original_expression,
+            'processed_expression': self.processed_expression,
+            'type': self.type,
+            'variables': list(self.variables),
+            'is_valid': self.is_valid,
+            'error': self.error,
+            'primary_variable': self.primary_variable,
+            'parameters': list(self.parameters),
+        }
+        if include_parts and self.equation_parts is not None:
+            result['equation_parts'] = {'left': self.equation_parts[0], 'right': self.equation_parts[1]}
+        if self.is_numexpr_safe is not None:
+            result['is_numexpr_safe'] = self.is_numexpr_safe
+        return result
+
+@lru_cache(maxsize=1024)
+def _analyze_expression(expression: str) -> ExpressionFacts:
+    """
+    Parse and walk an expression once, collecting its ExpressionFacts. Raises SyntaxError
+    for unparsable input. Finiteness: only sums, products and negations of finite literals,
+    names and FINITE_FUNCTIONS calls qualify; division, powers, modulo and functions with
+    poles or restricted domains (log, sqrt, tan, asin, exp, ...) do not.
+    """
+    unsupported = None
+    names = set()
+    arguments = set()
+    called = set()
+    numexpr_safe = True
+    finite = True
+    # Breadth-first like ast.walk, inlined to skip its per-node generator calls;
+    # a call is always reached before the name it calls
+    todo = deque([parse_tree(expression)])
+    while todo:
+        node = todo.popleft()
+        node_type = type(node)
+        if unsupported is None and node_type not in ALLOWED_NODES:
+            unsupported = node_type.__name__
+        if finite and node_type not in FINITE_NODES:
+            finite = False
+        if node_type is ast.Name:
+            names.add(node.id)
+            if id(node) not in called:
+                arguments.add(node.id)
+            continue
+        if node_type is ast.Call:
+            func = node.func
+            called.add(id(func))
+            is_named = type(func) is ast.Name
+            if numexpr_safe and not (is_named and func.id in NUMEXPR_FUNCTIONS):
+                numexpr_safe = False
+            if finite and not (is_named and func.id in FINITE_FUNCTIONS):
+                finite = False
+        elif node_type is ast.Constant and finite:
+            value = node.value
+            finite = type(value) in (int, float) and math.isfinite(value)
+        for field in node._fields:
+            child = getattr(node, field, None)
+            if isinstance(child, ast.AST):
+                todo.append(child)
+            elif isinstance(child, list):
+                todo.extend(item for item in child if isinstance(item, ast.AST))
+    
+    # Variables exclude mathematical functions and constants, removed in one set difference
+    return ExpressionFacts(unsupported, frozenset(names) - RESERVED_NAMES, frozenset(arguments), numexpr_safe, finite)
+
+def _extract_variables(expression: str) -> frozenset:
+    """Memoized variable extraction; callers receive a copy they may mutate"""
+    try:
+        return _analyze_expression(expression).variables
+    except Exception as e:
+        raise ValueError(f"Failed to parse expression: {e}")
+
+def _is_numexpr_safe(expression: str) -> bool:
+    """Memoized check that every function the expression calls is implemented by numexpr"""
+    try:
+        return _analyze_expression(expression).numexpr_safe
+    except SyntaxError:
+        return False
+
 class ExpressionParser:
+    # Entries kept per derived-expression cache before the least recently used is evicted
+    CACHE_SIZE = 512
+    
     def __init__(self):
-        self.compiled_expressions = {}
+        # Derived expression text by source text; written and reordered under the lock, read without it
+        self.compiled_expressions: OrderedDict[str, str] = OrderedDict()
+        self.preprocessed_expressions: OrderedDict[str, str] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Validation results are immutable tuples of the text alone; slider updates re-check the same input
+        self._validate_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._validate_impl)
         self.latex_mapping = {
             r'\\frac\{([^}]+)\}\{([^}]+)\}': r'(\1)/(\2)',
             r'\\sqrt\{([^}]+)\}': r'sqrt(\1)',
@@ -85,25 +581,24 @@ class ExpressionParser:
             '&pi;': 'pi',
             '&infin;': 'inf',
         }
+        
+        # One-pass converters built from the mappings above; capture-group LaTeX rules stay
+        # regex substitutions and run first, the literal tokens are replaced in one scan
+        latex_rules = [(re.compile(pattern), replacement) for pattern, replacement in self.latex_mapping.items()]
+        self._latex_group_rules = [(regex, replacement) for regex, replacement in latex_rules if regex.groups]
+        self._replace_latex_tokens = token_replacer({
+            re.sub(r'\\(.)', r'\1', regex.pattern): replacement
+            for regex, replacement in latex_rules if not regex.groups
+        })
+        self._replace_html_entities = token_replacer(self.html_entity_mapping)
     
     def extract_variables(self, expression: str) -> Set[str]:
         """Extract variable names from a mathematical expression"""
-        try:
-            # Parse the expression into an AST
-            tree = ast.parse(expression, mode='eval')
-            
-            variables = set()
-            
-            # Walk the AST and collect variable names
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Name):
-                    # Exclude mathematical functions and constants
-                    if node.id not in MATH_FUNCTIONS and node.id not in MATH_CONSTANTS:
-                        variables.add(node.id)
-            
-            return variables
-        except Exception as e:
-            raise ValueError(f"Failed to parse expression: {e}")
+        return set(_extract_variables(expression))
+    
+    def is_numexpr_safe(self, expression: str) -> bool:
+        """Check whether every function the expression calls is implemented by numexpr"""
+        return _is_numexpr_safe(expression)
     
     def parse_expression_type(self, expression: str) -> str:
         """Determine if expression is implicit, parametric, or explicit function"""
@@ -111,7 +606,7 @@ class ExpressionParser:
         if '=' in expression and not any(op in expression for op in ['<', '>', '<=', '>=', '!=']):
             return "implicit"
         # Check for parametric - only if it looks like x(t) or y(t) specifically
-        elif re.search(r'[xy]\s*\(', expression):
+        elif _PARAMETRIC_CALL_RE.search(expression):
             return "parametric"
         else:
             return "explicit"
@@ -119,96 +614,65 @@ class ExpressionParser:
     def convert_latex_to_ascii(self, expression: str) -> str:
         """Convert LaTeX expressions to ASCII format"""
         result = expression
-        for latex_pattern, ascii_replacement in self.latex_mapping.items():
-            result = re.sub(latex_pattern, ascii_replacement, result)
-        return result
+        if '\\' in result:
+            for regex, ascii_replacement in self._latex_group_rules:
+                result = regex.sub(ascii_replacement, result)
+        return self._replace_latex_tokens(result)
     
     def convert_html_entities(self, expression: str) -> str:
         """Convert HTML entities to ASCII format"""
-        result = expression
-        for html_entity, ascii_replacement in self.html_entity_mapping.items():
-            result = result.replace(html_entity, ascii_replacement)
-        return result
+        if '&' not in expression:
+            return expression
+        return self._replace_html_entities(expression)
     
     def add_implicit_multiplication(self, expression: str) -> str:
         """Add explicit multiplication operators for implicit multiplication cases"""
         result = expression
         
-        # Define mathematical function names that should NOT be broken up
-        function_names = [
-            'sin', 'cos', 'tan', 'log', 'exp', 'sqrt', 'abs', 'asin', 'acos', 'atan',
-            'sinh', 'cosh', 'tanh', 'log10', 'log2', 'floor', 'ceil', 'round', 'sign'
-        ]
+        # Rewrite rules are compiled once at import (IMPLICIT_FUNCTION_NAMES); each pattern
+        # contains its function name literally, so only the rules for names found in one
+        # scan of the input are run, and none at all for expressions without functions
+        present = frozenset(func for func in IMPLICIT_FUNCTION_NAMES if func in result)
+        argument_rules, function_rules, call_rules = _implicit_rules_for(present)
         
         # Step 1: Handle function-variable cases first (highest priority)
         # sinx -> sin(x), cosx -> cos(x), etc.
-        for func in function_names:
-            # Handle sinx -> sin(x) where x is a single variable
-            result = re.sub(rf'{func}([a-zA-Z])(?!\w)', rf'{func}(\1)', result)
+        for regex, replacement in argument_rules:
+            result = regex.sub(replacement, result)
         
         # Step 2: Handle number-function cases
         # 2sin(x) -> 2*sin(x), 2sin -> 2*sin
-        for func in function_names:
-            # Handle 2sin(x) -> 2*sin(x)
-            result = re.sub(rf'(\d+){func}\s*\(', rf'\1*{func}(', result)
-            # Handle 2sin -> 2*sin (standalone function name)
-            result = re.sub(rf'(\d+){func}(?!\w)', rf'\1*{func}', result)
-        
         # Step 3: Handle variable-function cases
         # xsin(x) -> x*sin(x), xsin -> x*sin, xcosy -> x*cos(y)
-        for func in function_names:
-            # Handle xsin(x) -> x*sin(x)
-            result = re.sub(rf'([a-zA-Z]){func}\s*\(', rf'\1*{func}(', result)
-            # Handle xcosy -> x*cos(y) where y is a single variable
-            result = re.sub(rf'([a-zA-Z]){func}([a-zA-Z])(?!\w)', rf'\1*{func}(\2)', result)
-            # Handle xsin -> x*sin (standalone function name)
-            result = re.sub(rf'([a-zA-Z]){func}(?!\w)(?!\()', rf'\1*{func}', result)
+        for regex, replacement in function_rules:
+            result = regex.sub(replacement, result)
         
         # Step 4: Handle function-function cases (after function-variable is handled)
         # This should now work on sin(x)cosy -> sin(x)*cos(y) and sin(x)cos(y) -> sin(x)*cos(y)
-        for func1 in function_names:
-            for func2 in function_names:
-                # Handle func1(x)func2y -> func1(x)*func2(y)
-                result = re.sub(rf'({func1}\([^)]*\))({func2})([a-zA-Z])(?!\w)', rf'\1*\2(\3)', result)
-                # Handle func1(x)func2( -> func1(x)*func2(
-                result = re.sub(rf'({func1}\([^)]*\))({func2})\s*\(', rf'\1*\2(', result)
-                # Handle func1(x)func2(y) -> func1(x)*func2(y) (NEW CASE)
-                result = re.sub(rf'({func1}\([^)]*\))({func2})\s*\(\s*([a-zA-Z]+)\s*\)', rf'\1*\2(\3)', result)
+        # Every case needs ')' directly followed by a function name, so plain input skips the pass
+        if present and ')' in result:
+            result = _function_products(result)
         
         # Step 4.5: Handle remaining function-variable cases that might have been missed
         # This catches cases like sinx in sinxcosy that weren't processed earlier
-        for func in function_names:
-            result = re.sub(rf'{func}([a-zA-Z])(?!\w)', rf'{func}(\1)', result)
+        for regex, replacement in argument_rules:
+            result = regex.sub(replacement, result)
         
         # Step 5: Handle basic cases
-        # 2x -> 2*x
-        result = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', result)
-
-        # x2 -> x*2, y7 -> y*7, etc.
-        result = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', result)
-
-        # 2(x+1) -> 2*(x+1)
-        result = re.sub(r'(\d)\s*\(', r'\1*(', result)
+        # 2x -> 2*x, x2 -> x*2, y7 -> y*7, (x+1)2 -> (x+1)*2, (x+1)y -> (x+1)*y,
+        # (x+1)(y+2) -> (x+1)*(y+2)
+        result = _PRODUCT_BOUNDARY_RE.sub('*', result)
         
-        # x(y+1) -> x*(y+1), but NOT sin(x)
+        # 2(x+1) -> 2*(x+1), x(y+1) -> x*(y+1), but NOT sin(x)
         # First protect function calls with parentheses
-        for func in function_names:
-            result = re.sub(rf'\b{func}\s*\(', f'FUNC_{func}_CALL_', result)
+        for func, regex, placeholder in call_rules:
+            result = regex.sub(placeholder, result)
         
-        result = re.sub(r'([a-zA-Z])\s*\(', r'\1*(', result)
+        result = _OPERAND_PAREN_RE.sub(r'\1*(', result)
         
         # Restore function calls
-        for func in function_names:
-            result = result.replace(f'FUNC_{func}_CALL_', f'{func}(')
-        
-        # (x+1)2 -> (x+1)*2
-        result = re.sub(r'\)(\d)', r')*\1', result)
-        
-        # (x+1)y -> (x+1)*y
-        result = re.sub(r'\)([a-zA-Z])', r')*\1', result)
-        
-        # (x+1)(y+2) -> (x+1)*(y+2)
-        result = re.sub(r'\)\s*\(', r')*(', result)
+        for func, regex, placeholder in call_rules:
+            result = result.replace(placeholder, f'{func}(')
         
         # Step 6: Handle simple variable-variable cases only (avoid breaking function names)
         # Only handle the most obvious cases: consecutive single letters that are clearly variables
@@ -220,53 +684,68 @@ class ExpressionParser:
         
         # Handle xy, xz, yz, etc. but only when they're standalone
         # Use negative lookbehind and lookahead to avoid function names
-        result = re.sub(r'(?<!\w)([a-zA-Z])([a-zA-Z])(?!\w)', r'\1*\2', result)
-        
-        # Apply again for cases like xyz -> xy*z -> x*y*z
-        result = re.sub(r'(?<!\w)([a-zA-Z])([a-zA-Z])(?!\w)', r'\1*\2', result)
+        # One pass finds every pair: inserting '*' splits a pair without creating a new one
+        result = _LETTER_PAIR_RE.sub(r'\1*\2', result)
         
         return result
     
+    def _lookup(self, cache: 'OrderedDict[str, str]', expression: str) -> Optional[str]:
+        """Cached derived text for an expression, or None; a hit becomes the most recently used entry"""
+        derived = cache.get(expression)
+        if derived is not None:
+            with self._cache_lock:
+                if expression in cache:
+                    cache.move_to_end(expression)
+        return derived
+    
+    def _remember(self, cache: 'OrderedDict[str, str]', expression: str, derived: str) -> str:
+        """Cache derived text for an expression, evicting the least recently used entry once full"""
+        with self._cache_lock:
+            cache[expression] = derived
+            cache.move_to_end(expression)
+            if len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
+        return derived
+    
     def preprocess_expression(self, expression: str) -> str:
         """Preprocess expression by converting LaTeX and HTML entities and adding implicit multiplication"""
+        cached = self._lookup(self.preprocessed_expressions, expression)
+        if cached is not None:
+            return cached
+        
         # Convert HTML entities first
-        expression = self.convert_html_entities(expression)
+        processed = self.convert_html_entities(expression)
         # Then convert LaTeX
-        expression = self.convert_latex_to_ascii(expression)
+        processed = self.convert_latex_to_ascii(processed)
         # Finally add implicit multiplication
-        expression = self.add_implicit_multiplication(expression)
-        return expression
+        processed = self.add_implicit_multiplication(processed)
+        return self._remember(self.preprocessed_expressions, expression, processed)
     
     def validate_expression(self, expression: str) -> Tuple[bool, Optional[str]]:
         """Validate if the expression is syntactically correct and safe"""
+        return self._validate_cached(expression)
+    
+    def clear_caches(self):
+        """Drop memoized validation results and derived expression text"""
+        self._validate_cached.cache_clear()
+        with self._cache_lock:
+            self.preprocessed_expressions.clear()
+            self.compiled_expressions.clear()
+    
+    def _validate_impl(self, expression: str) -> Tuple[bool, Optional[str]]:
+        """Uncached body of validate_expression"""
         try:
             # Check expression type first
             expr_type = self.parse_expression_type(expression)
             
-            # Check for unsupported constructs in function expressions
-            unsupported_patterns = [
-                r'__.*__',  # dunder methods
-                r'import\s+',
-                r'exec\s*\(',
-                r'eval\s*\(',
-                r'open\s*\(',
-                r'file\s*\(',
-                r'input\s*\(',
-                r'globals\s*\(',
-                r'locals\s*\(',
-                r'vars\s*\(',
-                r'dir\s*\(',
-                r'\+\+',  # increment operator
-                r'--',  # decrement operator
-            ]
-            
             # Allow '=' for implicit equations, block for other types
             if expr_type != 'implicit' and '=' in expression:
                 return False, "Assignment operator (=) not supported in this context. For implicit equations, use format like 'x^2 + y^2 = 1'"
             
-            for pattern in unsupported_patterns:
-                if re.search(pattern, expression, re.IGNORECASE):
-                    return False, f"Unsupported expression construct: {pattern}"
+            # Check for unsupported constructs in function expressions
+            pattern = unsupported_construct(expression)
+            if pattern is not None:
+                return False, f"Unsupported expression construct: {pattern}"
             
             # For implicit equations, validate both sides separately
             if expr_type == 'implicit':
@@ -282,32 +761,17 @@ class ExpressionParser:
                 
                 # Try to parse both sides
                 try:
-                    ast.parse(left_side, mode='eval')
-                    ast.parse(right_side, mode='eval')
+                    parse_tree(left_side)
+                    parse_tree(right_side)
                 except SyntaxError as e:
                     return False, f"Syntax error in implicit equation: {e}"
                 
                 return True, None
             
-            # Try to parse the expression
-            tree = ast.parse(expression, mode='eval')
-            
-            # Check for unsupported AST nodes
-            allowed_nodes = {
-                ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant,
-                ast.Name, ast.Load, ast.Call, ast.Subscript,
-                ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp,
-                ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
-                ast.Is, ast.IsNot, ast.In, ast.NotIn,
-                ast.BoolOp, ast.And, ast.Or, ast.Not,
-                ast.IfExp, ast.Attribute, ast.BitXor, ast.Pow,
-                ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod,
-                ast.UAdd, ast.USub, ast.FloorDiv,
-            }
-            
-            for node in ast.walk(tree):
-                if type(node) not in allowed_nodes:
-                    return False, f"Unsupported expression construct: {type(node).__name__}"
+            # Parse and check for unsupported AST nodes in one shared, memoized walk
+            unsupported = _analyze_expression(expression).unsupported
+            if unsupported is not None:
+                return False, f"Unsupported expression construct: {unsupported}"
             
             return True, None
             
@@ -341,9 +805,8 @@ class ExpressionParser:
             
             # Validate both sides are valid expressions
             try:
-                import ast
-                ast.parse(left_side, mode='eval')
-                ast.parse(right_side, mode='eval')
+                parse_tree(left_side)
+                parse_tree(right_side)
                 is_valid = True
                 error = None
             except SyntaxError as e:
@@ -368,80 +831,690 @@ class ExpressionParser:
     
     def compile_expression(self, expression: str) -> Optional[str]:
         """Compile expression to optimized numexpr format for faster evaluation"""
+        cached = self._lookup(self.compiled_expressions, expression)
+        if cached is not None:
+            return cached
+        
         try:
-            # Replace mathematical functions with numexpr-compatible versions
-            compiled_expr = expression
+            # ^ to **; pi and e already have numexpr's spelling, so nothing else is rewritten
+            compiled_expr = expression.replace('^', '**')
             
-            # Replace common mathematical notation
-            compiled_expr = re.sub(r'\^', '**', compiled_expr)  # ^ to **
-            compiled_expr = re.sub(r'pi\b', 'pi', compiled_expr)
-            compiled_expr = re.sub(r'e\b', 'e', compiled_expr)
-            
-            # Cache the compiled expression
-            expr_hash = hash(expression)
-            self.compiled_expressions[expr_hash] = compiled_expr
-            
-            return compiled_expr
+            # Cache the compiled expression by its source text
+            return self._remember(self.compiled_expressions, expression, compiled_expr)
             
         except Exception as e:
             raise ValueError(f"Failed to compile expression: {e}")
 
+class _JitSource(ast.NodeTransformer):
+    """Rewrite a validated expression tree into NumPy calls over prefixed argument names"""
+    
+    def visit_Call(self, node: ast.Call) -> ast.Call:
+        node.args = [self.visit(arg) for arg in node.args]
+        node.func = ast.Attribute(value=ast.Name(id='np', ctx=ast.Load()),
+                                  attr=MATH_FUNCTIONS[node.func.id].__name__, ctx=ast.Load())
+        return node
+    
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        return ast.Name(id=f'_v_{node.id}', ctx=node.ctx)
+    
+    def visit_BinOp(self, node: ast.BinOp) -> ast.BinOp:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.BitXor):
+            node.op = ast.Pow()
+        return node
+
+@lru_cache(maxsize=128)
+def jit_compile(expression: str, names: Tuple[str, ...]) -> Optional[Any]:
+    """
+    Compile an expression into a Numba function taking its names positionally, or None
+    when Numba is unavailable or cannot build it. Numba compiles lazily, so the first call
+    may still fail and callers must be ready to fall back.
+    """
+    if numba is None:
+        return None
+    try:
+        body = ast.unparse(_JitSource().visit(ast.parse(expression, mode='eval')))
+        arguments = ', '.join(f'_v_{name}' for name in names)
+        namespace = {'np': np}
+        exec(f'def _kernel({arguments}):\n    return {body}\n', namespace)
+        # fastmath is left off: it assumes finite values and would break NaN/inf filtering
+        return numba.njit(parallel=True, error_model='numpy')(namespace['_kernel'])
+    except Exception:
+        return None
+
+@lru_cache(maxsize=128)
+def jit_sampler(expression: str, names: Tuple[str, ...]) -> Optional[Any]:
+    """
+    Compile y = f(x) over a linspace into one Numba loop that samples x, evaluates,
+    drops non-finite points and tracks the y range without NumPy temporaries. The function
+    takes (x_min, x_max, num_points, *other names in order) and returns
+    (x_kept, y_kept, count, y_min, y_max). None without Numba or when x is not a name;
+    like jit_compile, compilation happens on the first call, which may still fail.
+    """
+    if numba is None or 'x' not in names:
+        return None
+    try:
+        body = ast.unparse(_JitSource().visit(ast.parse(expression, mode='eval')))
+        arguments = ''.join(f', _v_{name}' for name in names if name != 'x')
+        namespace = {'np': np}
+        exec(
+            f'def _sample(_lo, _hi, _n{arguments}):\n'
+            '    _xs = np.empty(_n)\n'
+            '    _ys = np.empty(_n)\n'
+            '    _step = (_hi - _lo) / (_n - 1) if _n > 1 else 0.0\n'
+            '    _count = 0\n'
+            '    _low = np.inf\n'
+            '    _high = -np.inf\n'
+            '    for _i in range(_n):\n'
+            # Same points as np.linspace, whose last point is exactly the stop value
+            '        _v_x = _hi if _n > 1 and _i == _n - 1 else _lo + _i * _step\n'
+            f'        _y = {body}\n'
+            '        if np.isfinite(_y):\n'
+            '            _xs[_count] = _v_x\n'
+            '            _ys[_count] = _y\n'
+            '            _count += 1\n'
+            '            _low = min(_low, _y)\n'
+            '            _high = max(_high, _y)\n'
+            '    return _xs[:_count], _ys[:_count], _count, _low, _high\n',
+            namespace
+        )
+        # Compacting the kept points is sequential, so this loop is not parallelized
+        return numba.njit(nogil=True, error_model='numpy')(namespace['_sample'])
+    except Exception:
+        return None
+
+class CompiledExpression:
+    """
+    Expression compiled once into a numexpr program with a fixed argument signature.
+    Calling it binds arrays and parameters by name and runs the numexpr VM directly,
+    skipping validation, regex rewriting and numexpr's own parse on every evaluation.
+    Expressions using functions numexpr lacks are interpreted with NumPy instead.
+    Once a kernel has been called JIT_THRESHOLD times it moves to a Numba-compiled
+    function when Numba is installed. Polynomials in a single variable with literal
+    coefficients skip both and run Horner's rule in place. Inputs under
+    SMALL_ARRAY_SIZE elements run the compiled Python code on NumPy, which beats the
+    VM's dispatch overhead at that size. Every argument and the
+    result use one float dtype. `finite` records whether finite inputs always give
+    finite results, letting callers skip the NaN/infinity scan.
+    Obtain one with ExpressionEvaluator.compile and hold it across repeated
+    evaluations (animation frames, slider sweeps); evaluate and evaluate_scalar
+    report y = f(x) like the evaluator's own methods.
+    """
+    
+    JIT_THRESHOLD = 32
+    SMALL_ARRAY_SIZE = 1024
+    
+    def __init__(self, expression: str, names: Tuple[str, ...], is_numexpr_safe: bool = True,
+                 dtype: type = np.float64):
+        self.expression = expression
+        self.names = names
+        self.is_numexpr_safe = is_numexpr_safe
+        self.dtype = dtype
+        # Value each name takes when neither an array nor a parameter supplies it
+        self._defaults = tuple(dtype(MATH_CONSTANTS.get(name, 0.0)) for name in names)
+        self._program = None
+        self._tree = None
+        self._function = None
+        self._jitted = None
+        self._sampler = None
+        self._calls = 0
+        self._scalar = None
+        self._coefficients = None
+        self.finite = _analyze_expression(expression).finite
+        if len(names) == 1 and names[0] not in MATH_CONSTANTS:
+            coefficients = polynomial_coefficients(parse_tree(expression), names[0])
+            if coefficients is not None:
+                coefficients = np.trim_zeros(coefficients, 'b')
+                if coefficients.size > 1:
+                    self._coefficients = tuple(dtype(c) for c in coefficients)
+        if is_numexpr_safe:
+            self._program = ne.NumExpr(expression, signature=[(name, numexpr_type(dtype)) for name in names])
+        else:
+            # Compiled once; expressions outside the arithmetic subset are interpreted so they raise clearly
+            self._function = compile_fallback(expression, names)
+            if self._function is None:
+                self._tree = parse_tree(expression)
+    
+    def __call__(self, arrays: Dict[str, Any], params: Dict[str, float] = None) -> np.ndarray:
+        """Evaluate with arrays taking precedence over params, then constants; unknown names default to 0"""
+        dtype = self.dtype
+        if params:
+            args = [
+                arrays[name] if name in arrays else dtype(params[name]) if name in params else default
+                for name, default in zip(self.names, self._defaults)
+            ]
+        else:
+            args = [arrays.get(name, default) for name, default in zip(self.names, self._defaults)]
+        if self._coefficients is not None:
+            return self._horner(args[0])
+        if self._program is not None and all(np.size(arg) < self.SMALL_ARRAY_SIZE for arg in args):
+            # Lists are valid numexpr inputs but not NumPy operands; bind every argument as an array
+            args = [np.asarray(arg, dtype=dtype) for arg in args]
+            function = self._python_function()
+            if function:
+                with np.errstate(all='ignore'):
+                    return np.asarray(function(*args), dtype=self.dtype)
+        if self._calls < self.JIT_THRESHOLD:
+            self._calls += 1
+            if self._calls == self.JIT_THRESHOLD:
+                self._jitted = jit_compile(self.expression, self.names)
+        if self._jitted is not None:
+            try:
+                return np.asarray(self._jitted(*(float(arg) if np.ndim(arg) == 0 else arg for arg in args)),
+                                  dtype=self.dtype)
+            except Exception:
+                # Numba could not type this expression; stay on the interpreted paths
+                self._jitted = None
+        if self._program is not None:
+            try:
+                # Double-precision literals can widen a single-precision program's result
+                result = self._program(*args)
+                if result.dtype.kind == 'c':
+                    # Name-free programs fold in complex arithmetic, e.g. (-2)**0.5; off the real line is NaN
+                    result = np.where(result.imag == 0, result.real, np.nan)
+                return result.astype(self.dtype, copy=False)
+            except (NotImplementedError, KeyError, TypeError):
+                # numexpr rejected these inputs at run time; evaluate this call with NumPy instead
+                pass
+        with np.errstate(all='ignore'):
+            function = self._function or self._python_function()
+            if function:
+                return np.asarray(function(*args), dtype=self.dtype)
+            if self._tree is None:
+                self._tree = parse_tree(self.expression)
+            return np.asarray(evaluate_ast(self._tree, dict(zip(self.names, args))), dtype=self.dtype)
+    
+    def sample(self, x_range: Tuple[float, float], num_points: int, params: Dict[str, float] = None
+               ) -> Tuple[np.ndarray, np.ndarray, Optional[Tuple[float, float]]]:
+        """
+        y = f(x) over num_points from x_range in the kernel's dtype, filtered to finite points,
+        as keep_finite_range returns them. Hot float64 kernels with Numba run the fused jit_sampler loop; all
+        others evaluate the shared grid and filter it.
+        """
+        if self._jitted is not None and self.dtype is np.float64 and self._sampler is not False:
+            if self._sampler is None:
+                self._sampler = jit_sampler(self.expression, self.names) or False
+            if self._sampler:
+                params = params or {}
+                try:
+                    x_valid, y_valid, count, low, high = self._sampler(
+                        float(x_range[0]), float(x_range[1]), int(num_points), *(
+                            float(params[name]) if name in params else float(default)
+                            for name, default in zip(self.names, self._defaults) if name != 'x'
+                        ))
+                    return x_valid, y_valid, (float(low), float(high)) if count else None
+                except Exception:
+                    # Numba could not type the loop; evaluate over the grid from now on
+                    self._sampler = False
+        x_values = linspace_grid(x_range[0], x_range[1], num_points, self.dtype)
+        y_values = self({'x': x_values}, params)
+        # Constant expressions evaluate to a scalar; spread it over the grid
+        return keep_finite_range(x_values, np.broadcast_to(y_values, x_values.shape))
+    
+    def evaluate(self, x_values: Any, **params: float) -> np.ndarray:
+        """y = f(x) over x_values with infinities reported as NaN, like evaluate_expression"""
+        result = self({'x': x_values}, params)
+        return result if self.finite else nan_invalid(result)
+    
+    def evaluate_scalar(self, x: float, **params: float) -> float:
+        """y = f(x) at one point, NaN where it is not finite, like evaluate_single_point"""
+        result = self.at({'x': x}, params)
+        return result if math.isfinite(result) else float('nan')
+    
+    def at(self, point: Dict[str, float], params: Dict[str, float] = None) -> float:
+        """
+        Evaluate at a single point, binding like __call__. Runs the compiled Python code
+        on NumPy scalars, which beats the numexpr VM's per-call overhead for one value;
+        expressions outside that code's subset are evaluated as one-element arrays.
+        """
+        function = self._python_function()
+        if not function:
+            arrays = {name: np.array([value], dtype=self.dtype) for name, value in point.items()}
+            return float(np.asarray(self(arrays, params)).reshape(-1)[0])
+        
+        dtype = self.dtype
+        params = params or {}
+        with np.errstate(all='ignore'):
+            return float(function(*(
+                dtype(point[name]) if name in point else dtype(params[name]) if name in params else default
+                for name, default in zip(self.names, self._defaults)
+            )))
+    
+    def _python_function(self) -> Union[Callable[..., Any], bool]:
+        """compile_fallback's function for this kernel, compiled on first use; False when unavailable"""
+        if self._scalar is None:
+            self._scalar = self._function or compile_fallback(self.expression, self.names) or False
+        return self._scalar
+    
+    def _horner(self, x: Any) -> np.ndarray:
+        """Evaluate the polynomial with one result buffer and two in-place ufuncs per degree"""
+        x = np.asarray(x, dtype=self.dtype)
+        coefficients = self._coefficients
+        result = np.full(x.shape, coefficients[-1], dtype=self.dtype)
+        with np.errstate(all='ignore'):
+            for coefficient in coefficients[-2::-1]:
+                result *= x
+                result += coefficient
+        return result
+
+# Per-thread boolean scratch buffer behind finite_mask, grown to the largest size seen
+_scratch = threading.local()
+
+def finite_mask(values: np.ndarray) -> np.ndarray:
+    """
+    np.isfinite(values) written into a per-thread buffer instead of a fresh array. The mask
+    is only valid until the same thread calls this again, so it must never be returned.
+    """
+    buffer = getattr(_scratch, 'mask', None)
+    if buffer is None or buffer.size < values.size:
+        buffer = _scratch.mask = np.empty(values.size, dtype=bool)
+    return np.isfinite(values, out=buffer[:values.size].reshape(values.shape))
+
+def keep_finite(x_values: np.ndarray, y_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keep the points whose y is finite. The kept indices are found once and taken from both
+    axes; when every point is finite the inputs come back uncopied (y made contiguous).
+    """
+    if all_finite(y_values):
+        return x_values, np.ascontiguousarray(y_values)
+    kept = np.flatnonzero(finite_mask(y_values))
+    return x_values.take(kept), y_values.take(kept)
+
+def _finite_summary_loop(values: np.ndarray) -> Tuple[int, float, float]:
+    """Count, min and max of the finite values of a 1-D array in one loop (compiled by Numba)"""
+    count = 0
+    low = math.inf
+    high = -math.inf
+    for i in range(values.shape[0]):
+        value = values[i]
+        if math.isfinite(value):
+            count += 1
+            if value < low:
+                low = value
+            if value > high:
+                high = value
+    return count, low, high
+
+# Compiled on first use; without Numba the summary is assembled from NumPy reductions
+_finite_summary_jit = numba.njit(nogil=True)(_finite_summary_loop) if numba is not None else None
+
+def finite_summary(values: np.ndarray) -> Tuple[int, float, float]:
+    """
+    Number of finite values and their min and max (NaN when there are none). With Numba
+    this is one pass over the array instead of a mask and two reductions.
+    """
+    global _finite_summary_jit
+    values = np.asarray(values)
+    if _finite_summary_jit is not None and values.ndim == 1:
+        try:
+            count, low, high = _finite_summary_jit(values)
+            if count:
+                return int(count), float(low), float(high)
+            return 0, math.nan, math.nan
+        except Exception:
+            # Numba could not type this input; the NumPy path serves every call from now on
+            _finite_summary_jit = None
+    finite = finite_mask(values)
+    count = int(np.count_nonzero(finite))
+    if not count:
+        return 0, math.nan, math.nan
+    kept = values if count == values.size else values[finite]
+    return count, float(kept.min()), float(kept.max())
+
+def value_range(values: np.ndarray, default: Tuple[float, float]) -> Tuple[float, float]:
+    """(min, max) of the finite values, or default when there are none"""
+    count, low, high = finite_summary(values)
+    return (low, high) if count else default
+
+def keep_finite_range(x_values: np.ndarray, y_values: np.ndarray
+                      ) -> Tuple[np.ndarray, np.ndarray, Optional[Tuple[float, float]]]:
+    """
+    keep_finite plus the (min, max) of the kept y, or None when no point is finite.
+    The count from the same summary pass decides whether anything needs filtering.
+    """
+    count, low, high = finite_summary(y_values)
+    y_range = (low, high) if count else None
+    if count == np.size(y_values):
+        return x_values, np.ascontiguousarray(y_values), y_range
+    kept = np.flatnonzero(finite_mask(y_values))
+    return x_values.take(kept), y_values.take(kept), y_range
+
+def bracket_roots(kernel: 'CompiledExpression', x_range: Tuple[float, float], resolution: int,
+                  params: Dict[str, float] = None, max_iterations: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points where kernel(x, y) = 0 over the square x_range x x_range. The kernel is sampled
+    once on a shared mesh; every sign change along y brackets a root, and all brackets are
+    bisected together as arrays with masked in-place updates, one kernel call per step.
+    Sign changes across poles, where |f| grows instead of vanishing, are dropped.
+    """
+    X, Y = mesh_grid(x_range[0], x_range[1], x_range[0], x_range[1], resolution)
+    with np.errstate(all='ignore'):
+        F = np.broadcast_to(kernel({'x': X, 'y': Y}, params), X.shape)
+    
+    exact = F == 0
+    below = np.signbit(F)
+    crossing = (below[:-1] != below[1:]) & ~exact[:-1] & ~exact[1:]
+    crossing &= np.isfinite(F[:-1]) & np.isfinite(F[1:])
+    rows, cols = np.nonzero(crossing)
+    
+    x = X[0, cols]
+    lo, hi = Y[rows, 0], Y[rows + 1, 0]
+    f_lo, f_hi = F[rows, cols], F[rows + 1, cols]
+    bound = np.maximum(np.abs(f_lo), np.abs(f_hi))
+    tolerance = 1e-12 * max(1.0, abs(x_range[0]), abs(x_range[1]))
+    
+    with np.errstate(all='ignore'):
+        for _ in range(max_iterations):
+            if lo.size == 0 or np.max(hi - lo) <= tolerance:
+                break
+            mid = 0.5 * (lo + hi)
+            f_mid = np.broadcast_to(kernel({'x': x, 'y': mid}, params), mid.shape)
+            # Where f(mid) has f(lo)'s sign the root lies above mid
+            upper = np.signbit(f_mid) == np.signbit(f_lo)
+            np.copyto(lo, mid, where=upper)
+            np.copyto(f_lo, f_mid, where=upper)
+            np.logical_not(upper, out=upper)
+            np.copyto(hi, mid, where=upper)
+        roots = 0.5 * (lo + hi)
+        converged = np.abs(np.broadcast_to(kernel({'x': x, 'y': roots}, params), roots.shape)) <= bound
+    
+    exact_rows, exact_cols = np.nonzero(exact)
+    return (np.concatenate((x[converged], X[0, exact_cols])),
+            np.concatenate((roots[converged], Y[exact_rows, 0])))
+
+def numexpr_type(dtype: type) -> type:
+    """Type numexpr signatures spell dtype with: its single-precision kind is Python float"""
+    return float if dtype is np.float32 else np.float64
+
+def kernel_dtype(values: Any) -> type:
+    """Float dtype a kernel should use for these inputs: single precision only when given float32"""
+    return np.float32 if np.asarray(values).dtype == np.float32 else np.float64
+
+@lru_cache(maxsize=64)
+def linspace_grid(start: float, stop: float, num: int, dtype: type = np.float64) -> np.ndarray:
+    """Evenly spaced sample grid, built once per (start, stop, num, dtype) and shared read-only"""
+    grid = np.linspace(start, stop, num, dtype=dtype)
+    grid.setflags(write=False)
+    return grid
+
+@lru_cache(maxsize=16)
+def unit_circle_block(num: int) -> np.ndarray:
+    """(2, num) block of cos and sin rows over [0, 2*pi], computed once per size and shared read-only"""
+    angles = linspace_grid(0.0, 2 * np.pi, num)
+    block = np.empty((2, num))
+    np.cos(angles, out=block[0])
+    np.sin(angles, out=block[1])
+    block.setflags(write=False)
+    return block
+
+@lru_cache(maxsize=16)
+def unit_circle(num: int) -> Tuple[np.ndarray, np.ndarray]:
+    """cos and sin of num angles over [0, 2*pi], as read-only rows of unit_circle_block"""
+    block = unit_circle_block(num)
+    return block[0], block[1]
+
+@lru_cache(maxsize=64)
+def scaled_unit_circle(a: float, b: float, num: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(a*cos, b*sin) over the shared unit circle, scaled in one multiply per conic and shared read-only"""
+    points = unit_circle_block(num) * np.array([[a], [b]])
+    points.setflags(write=False)
+    return points[0], points[1]
+
+@lru_cache(maxsize=16)
+def mesh_grid(x_start: float, x_stop: float, y_start: float, y_stop: float,
+              resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """2D sample mesh for surfaces, built once per range/resolution and shared read-only"""
+    X, Y = np.meshgrid(linspace_grid(x_start, x_stop, resolution), linspace_grid(y_start, y_stop, resolution))
+    X.setflags(write=False)
+    Y.setflags(write=False)
+    return X, Y
+
+_kernel_parser = ExpressionParser()
+
+def compile_kernel(expression: str, dtype: type = np.float64) -> CompiledExpression:
+    """Validate and compile an expression once; repeated calls return the cached kernel"""
+    # lru_cache keys compile_kernel(e) and compile_kernel(e, np.float64) apart; passing dtype
+    # through positionally gives every caller the same kernel, JIT warm-up and sampler
+    return _compile_kernel(expression, dtype)
+
+@lru_cache(maxsize=512)
+def _compile_kernel(expression: str, dtype: type) -> CompiledExpression:
+    """Uncached body of compile_kernel"""
+    is_valid, error_msg = _kernel_parser.validate_expression(expression)
+    if not is_valid:
+        raise ValueError(error_msg)
+    
+    compiled_expr = _kernel_parser.compile_expression(expression)
+    
+    # Every name except called functions becomes a positional argument of the program
+    facts = _analyze_expression(compiled_expr)
+    return CompiledExpression(compiled_expr, tuple(sorted(facts.arguments)), facts.numexpr_safe, dtype)
+
+def clear_kernel_cache():
+    """Drop compiled kernels and the validation results they were built from"""
+    _compile_kernel.cache_clear()
+    _kernel_parser.clear_caches()
+
+def require_bound(kernel: CompiledExpression, axes: Tuple[str, ...], params: Optional[Dict[str, float]]) -> None:
+    """Raise for kernel arguments that are not a sampled axis, a parameter or a constant"""
+    undefined = [name for name in kernel.names if name not in axes and name not in (params or {}) and name not in MATH_CONSTANTS]
+    if undefined:
+        raise ValueError(f"Undefined variables: {', '.join(undefined)}")
+
+@lru_cache(maxsize=128)
+def pair_program(x_kernel: CompiledExpression, y_kernel: CompiledExpression) -> Optional[Tuple[Any, Tuple[str, ...]]]:
+    """
+    One numexpr program computing complex(x, y) for two numexpr-safe kernels, with the
+    union of their names as its signature, or None when numexpr cannot build it. Both
+    components come out of a single pass, and subexpressions they share are computed once.
+    """
+    if not (x_kernel.is_numexpr_safe and y_kernel.is_numexpr_safe):
+        return None
+    names = tuple(sorted(set(x_kernel.names) | set(y_kernel.names)))
+    try:
+        program = ne.NumExpr(f'complex({x_kernel.expression}, {y_kernel.expression})',
+                             signature=[(name, numexpr_type(x_kernel.dtype)) for name in names])
+    except Exception:
+        return None
+    return program, names
+
+# Implicit equations solve_implicit_equation recognizes before bracketing roots, dispatched by one
+# search on the named alternative that matched
+_IMPLICIT_RE = re.compile(
+    r'(?P<line>(?P<axis>[xy])\s*=\s*(?P<value>-?\d+(?:\.\d+)?))'  # x=5 or y=-6
+    r'|(?P<circle>x\^2\s*\+\s*y\^2\s*=\s*(?P<radius_squared>\d+(?:\.\d+)?))'  # x^2 + y^2 = r^2
+    r'|(?P<ellipse>x\^2\s*/\s*(?P<a>\d+(?:\.\d+)?)\s*\+\s*y\^2(?:\s*/\s*(?P<b>\d+(?:\.\d+)?))?\s*=\s*1)'
+)
+
+# LaTeX symbols ExpressionEvaluator.convert_latex_to_ascii spells out
+LATEX_GREEK_LETTERS = {
+    '\\alpha': 'alpha',
+    '\\beta': 'beta', 
+    '\\gamma': 'gamma',
+    '\\delta': 'delta',
+    '\\epsilon': 'epsilon',
+    '\\zeta': 'zeta',
+    '\\eta': 'eta',
+    '\\theta': 'theta',
+    '\\iota': 'iota',
+    '\\kappa': 'kappa',
+    '\\lambda': 'lambda',
+    '\\mu': 'mu',
+    '\\nu': 'nu',
+    '\\xi': 'xi',
+    '\\pi': 'pi',
+    '\\rho': 'rho',
+    '\\sigma': 'sigma',
+    '\\tau': 'tau',
+    '\\upsilon': 'upsilon',
+    '\\phi': 'phi',
+    '\\chi': 'chi',
+    '\\psi': 'psi',
+    '\\omega': 'omega',
+    '\\Alpha': 'Alpha',
+    '\\Beta': 'Beta',
+    '\\Gamma': 'Gamma',
+    '\\Delta': 'Delta',
+    '\\Epsilon': 'Epsilon',
+    '\\Zeta': 'Zeta',
+    '\\Eta': 'Eta',
+    '\\Theta': 'Theta',
+    '\\Iota': 'Iota',
+    '\\Kappa': 'Kappa',
+    '\\Lambda': 'Lambda',
+    '\\Mu': 'Mu',
+    '\\Nu': 'Nu',
+    '\\Xi': 'Xi',
+    '\\Pi': 'Pi',
+    '\\Rho': 'Rho',
+    '\\Sigma': 'Sigma',
+    '\\Tau': 'Tau',
+    '\\Upsilon': 'Upsilon',
+    '\\Phi': 'Phi',
+    '\\Chi': 'Chi',
+    '\\Psi': 'Psi',
+    '\\Omega': 'Omega'
+}
+
+LATEX_OPERATORS = {
+    '\\times': '*',
+    '\\cdot': '*',
+    '\\div': '/',
+    '\\pm': '+/-',
+    '\\mp': '-/+',
+    '\\leq': '<=',
+    '\\geq': '>=',
+    '\\neq': '!=',
+    '\\approx': '~=',
+    '\\equiv': '==',
+    '\\infty': 'inf',
+    '\\sum': 'sum',
+    '\\prod': 'prod',
+    '\\int': 'int',
+    '\\partial': 'd',
+    '\\nabla': 'grad',
+    '\\sin': 'sin',
+    '\\cos': 'cos',
+    '\\tan': 'tan',
+    '\\log': 'log',
+    '\\ln': 'ln',
+    '\\sqrt': 'sqrt'
+}
+_replace_latex_symbols = token_replacer({**LATEX_GREEK_LETTERS, **LATEX_OPERATORS})
+_replace_latex_delimiters = token_replacer({
+    '\\left(': '(',
+    '\\right(': ')',
+    '\\left[': '[',
+    '\\right[': ']',
+    '\\left{': '{',
+    '\\right{': '}',
+})
+_LATEX_FRACTION_RE = re.compile(r'\\frac\{([^}]+)\}\{([^}]+)\}')
+_LATEX_SUPERSCRIPT_RE = re.compile(r'\^{([^}]+)}')
+_LATEX_SUBSCRIPT_RE = re.compile(r'_{([^}]+)}')
+_STRAY_BACKSLASH_RE = re.compile(r'\\(?![a-zA-Z{}^_])')
+
+def _split_equation(equation: str) -> Optional[Tuple[str, str]]:
+    """Stripped sides around the first '=', or None when there is none"""
+    index = equation.find('=')
+    if index < 0:
+        return None
+    return equation[:index].strip(), equation[index + 1:].strip()
+
+def _equation_difference(left: str, right: str) -> str:
+    """left - right as one expression, so both sides of an equation share a single parse"""
+    return f"({left}) - ({right})"
+
+# Identifier-like runs, including the exponent of float literals such as 1e5
+_IDENTIFIER_RE = re.compile(r'[^\W\d]\w*')
+
+def _letter_variables(text: str) -> Optional[frozenset]:
+    """
+    Variables read straight from the text when every identifier in it is a single ASCII
+    letter; None when a longer identifier (function, constant, 1e5) needs a real parse
+    """
+    identifiers = _IDENTIFIER_RE.findall(text)
+    if any(len(name) != 1 or not name.isascii() for name in identifiers):
+        return None
+    return frozenset(identifiers) - RESERVED_NAMES
+
+def _single_letter_names(text: str) -> Set[str]:
+    """
+    Isolated ASCII letters in text, as the regex \\b[a-zA-Z]\\b would find them; used for
+    implicit equations whose sides fail to parse. A plain scan skips the regex engine.
+    """
+    names = set()
+    last = len(text) - 1
+    for i, ch in enumerate(text):
+        if ch.isascii() and ch.isalpha() \
+                and (i == 0 or not (text[i - 1].isalnum() or text[i - 1] == '_')) \
+                and (i == last or not (text[i + 1].isalnum() or text[i + 1] == '_')):
+            names.add(ch)
+    return names
+
 class ExpressionEvaluator:
+    # Mesh size per axis when bracketing implicit equations the pattern solvers miss
+    IMPLICIT_RESOLUTION = 400
+    
     def __init__(self):
         self.parser = ExpressionParser()
+        # Classification depends only on the expression text; replots of the same input reuse it
+        self._classify_cached = lru_cache(maxsize=ExpressionParser.CACHE_SIZE)(self._classify_impl)
+    
+    def clear_caches(self):
+        """Drop memoized classifications along with the parser's caches"""
+        self._classify_cached.cache_clear()
+        self.parser.clear_caches()
+    
+    def compile(self, expression: str, dtype: type = np.float64) -> CompiledExpression:
+        """
+        Preprocess, validate and compile user input once. The returned kernel is shared
+        through compile_kernel's cache and can be kept by callers that evaluate the same
+        expression repeatedly, skipping all string work on later calls.
+        """
+        try:
+            return compile_kernel(self.parser.preprocess_expression(expression), dtype)
+        except Exception as e:
+            raise ValueError(f"Expression compilation failed: {e}")
     
     def evaluate_expression(self, expression: str, x_values: np.ndarray, 
                           params: Dict[str, float] = None) -> np.ndarray:
         """Evaluate expression for given x values and parameters"""
         try:
-            # Validate expression
-            is_valid, error_msg = self.parser.validate_expression(expression)
-            if not is_valid:
-                raise ValueError(error_msg)
-            
-            # Compile expression
-            compiled_expr = self.parser.compile_expression(expression)
-            
-            # Prepare evaluation context
-            context = {
-                'x': x_values,
-                **MATH_FUNCTIONS,
-                **MATH_CONSTANTS,
-                **(params or {})
-            }
+            # Compile once per unique expression and precision, and reuse the kernel across calls
+            kernel = compile_kernel(expression, kernel_dtype(x_values))
             
-            # Add any missing variables from parameters
-            variables = self.parser.extract_variables(expression)
-            for var in variables:
-                if var != 'x' and var not in context:
-                    if var in params:
-                        context[var] = params[var]
-                    else:
-                        # If variable not provided, assume it's 0
-                        context[var] = 0.0
+            # Evaluate using the compiled numexpr program; infinities become NaN
+            # unless the expression cannot produce them
+            return kernel.evaluate(x_values, **(params or {}))
             
-            # Evaluate using numexpr for better performance
-            result = ne.evaluate(compiled_expr, local_dict=context)
-            
-            # Handle infinite values and NaN
-            result = np.where(np.isfinite(result), result, np.nan)
-            
-            return result
+        except Exception as e:
+            raise ValueError(f"Expression evaluation failed: {e}")
+    
+    def evaluate_finite_points(self, expression: str, x_values: np.ndarray,
+                               params: Dict[str, float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate y = f(x) and keep only the finite points in one pass over the result.
+        Skips the NaN sanitizing copy evaluate_expression makes, since the mask drops those points anyway.
+        """
+        try:
+            kernel = compile_kernel(expression, kernel_dtype(x_values))
+            y_values = np.broadcast_to(kernel({'x': x_values}, params), np.shape(x_values))
+            if kernel.finite:
+                return x_values, np.ascontiguousarray(y_values)
+            return keep_finite(x_values, y_values)
             
         except Exception as e:
             raise ValueError(f"Expression evaluation failed: {e}")
     
     def evaluate_single_point(self, expression: str, x: float, 
                             params: Dict[str, float] = None) -> float:
-        """Evaluate expression at a single point"""
-        x_array = np.array([x])
-        result = self.evaluate_expression(expression, x_array, params)
-        
-        # Handle both 0-dimensional and 1-dimensional arrays
-        if result.ndim == 0:
-            return float(result) if not np.isnan(result) else float('nan')
-        else:
-            return float(result[0]) if not np.isnan(result[0]) else float('nan')
+        """Evaluate expression at a single point, without building arrays for the numexpr VM"""
+        try:
+            # Infinite values are reported as NaN, like evaluate_expression
+            return compile_kernel(expression).evaluate_scalar(x, **(params or {}))
+        except Exception as e:
+            raise ValueError(f"Expression evaluation failed: {e}")
     
     def solve_implicit_equation(self, equation: str, x_range: Tuple[float, float], 
                                num_points: int = 1000, params: Dict[str, float] = None) -> Tuple[np.ndarray, np.ndarray]:
@@ -451,69 +1524,68 @@ class ExpressionEvaluator:
         """
         try:
             # Preprocess the equation
-            equation = self.parser.preprocess_expression(equation)
+            processed = self.parser.preprocess_expression(equation)
             
             # Handle common implicit equation patterns
-            equation = equation.replace('**', '^')
+            equation = processed.replace('**', '^')
             
-            # Simple pattern matching for common equations
-            import re
+            # Simple pattern matching for common equations: one pass picks the branch
+            match = _IMPLICIT_RE.search(equation)
+            kind = match.lastgroup if match else None
 
             # x=5 or y=-6
-            simple_match = re.search(r'([xy])\s*=\s*(-?\d+(?:\.\d+)?)', equation)
-            if simple_match:
-                if simple_match.group(1) == 'x':
-                    x_coords = [float(simple_match.group(2)), float(simple_match.group(2))]
-                    y_coords = [num_points, -num_points]
-                elif simple_match.group(1) == 'y':
-                    x_coords = [num_points, -num_points]
-                    y_coords = [float(simple_match.group(2)), float(simple_match.group(2))]
-                else:
-                    x_coords = [float(simple_match.group(2)), float(simple_match.group(2))]
-                    y_coords = [num_points, -num_points]
-
-                return x_coords, y_coords
+            if kind == 'line':
+                value = float(match.group('value'))
+                if match.group('axis') == 'x':
+                    return [value, value], [num_points, -num_points]
+                return [num_points, -num_points], [value, value]
             
             # Circle: x^2 + y^2 = r^2
-            if re.search(r'x\^2\s*\+\s*y\^2\s*=', equation):
-                match = re.search(r'=\s*(\d+(?:\.\d+)?)', equation)
-                if match:
-                    radius_squared = float(match.group(1))
-                    radius = np.sqrt(radius_squared)
-                    angles = np.linspace(0, 2*np.pi, num_points)
-                    x_coords = radius * np.cos(angles)
-                    y_coords = radius * np.sin(angles)
-                    return x_coords, y_coords
+            if kind == 'circle':
+                radius = np.sqrt(float(match.group('radius_squared')))
+                # Trig is shared per size; both axes are scaled in one pass
+                return scaled_unit_circle(radius, radius, num_points)
             
             # Ellipse: x^2/a^2 + y^2/b^2 = 1 or x^2/a + y^2/b = 1
-            ellipse_match = re.search(r'x\^2\s*/\s*(\d+(?:\.\d+)?)\s*\+\s*y\^2(?:\s*/\s*(\d+(?:\.\d+)?))?\s*=\s*1', equation)
-            if ellipse_match:
-                a_val = float(ellipse_match.group(1))
-                b_val = float(ellipse_match.group(2)) if ellipse_match.group(2) else 1.0
+            if kind == 'ellipse':
+                a_val = float(match.group('a'))
+                b_val = float(match.group('b')) if match.group('b') else 1.0
                 
                 # a_val and b_val are the denominators, so semi-axes are sqrt of them
                 a = np.sqrt(a_val)
                 b = np.sqrt(b_val)
                 
-                angles = np.linspace(0, 2*np.pi, num_points)
-                x_coords = a * np.cos(angles)
-                y_coords = b * np.sin(angles)
-                return x_coords, y_coords
+                return scaled_unit_circle(a, b, num_points)
             
-            # Fallback: return empty arrays
-            return np.array([]), np.array([])
+            # Anything else: bracket the roots of left - right numerically
+            return self._bracket_implicit_equation(processed, x_range, num_points, params)
             
         except Exception as e:
             raise ValueError(f"Implicit equation solving failed: {str(e)[:100]}")
     
+    def _bracket_implicit_equation(self, equation: str, x_range: Tuple[float, float],
+                                   num_points: int, params: Dict[str, float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Solve left = right by vectorized bisection; equations it cannot evaluate have no points"""
+        sides = [side.strip() for side in equation.split('=')]
+        if len(sides) != 2 or not all(sides):
+            return np.array([]), np.array([])
+        try:
+            kernel = compile_kernel(_equation_difference(*sides))
+            resolution = min(max(int(num_points), 10), self.IMPLICIT_RESOLUTION)
+            return bracket_roots(kernel, x_range, resolution, params)
+        except (TypeError, ValueError):
+            return np.array([]), np.array([])
+    
     def _finite_difference(self, x_val: float, y_val: float, func, h: float = 1e-6) -> float:
         """Calculate finite difference approximation of derivative"""
         return (func(x_val, y_val + h) - func(x_val, y_val - h)) / (2 * h)
     
     def evaluate_parametric(self, x_expr: str, y_expr: str, t_range: Tuple[float, float], 
-                           num_points: int = 1000, params: Dict[str, float] = None) -> Tuple[np.ndarray, np.ndarray]:
+                           num_points: int = 1000, params: Dict[str, float] = None,
+                           dtype: type = np.float64) -> Tuple[np.ndarray, np.ndarray]:
         """
         Evaluate parametric equations x(t), y(t)
+        dtype np.float32 samples t and evaluates both components in single precision.
         """
         try:
             # Preprocess expressions
@@ -521,22 +1593,42 @@ class ExpressionEvaluator:
             y_expr = self.parser.preprocess_expression(y_expr)
             
             # Generate t values
-            t_values = np.linspace(t_range[0], t_range[1], num_points)
+            t_values = linspace_grid(t_range[0], t_range[1], num_points, dtype)
             
-            # Prepare evaluation context
-            context = {
-                **MATH_FUNCTIONS, **MATH_CONSTANTS,
-                **(params or {})
-            }
+            # Compiled kernels bind t and the parameters positionally; no context dict is built
+            params = params or {}
+            arrays = {'t': t_values}
+            x_kernel = compile_kernel(x_expr, dtype)
+            y_kernel = compile_kernel(y_expr, dtype)
+            for kernel in (x_kernel, y_kernel):
+                require_bound(kernel, ('t',), params)
             
-            # Evaluate x(t) and y(t)
-            context['t'] = t_values
-            x_values = ne.evaluate(self.parser.compile_expression(x_expr), local_dict=context)
-            y_values = ne.evaluate(self.parser.compile_expression(y_expr), local_dict=context)
+            # Long double-precision curves evaluate x(t) and y(t) together as one complex128 program;
+            # short and single-precision ones stay on the per-kernel paths
+            pair = None
+            if dtype is np.float64 and t_values.size >= CompiledExpression.SMALL_ARRAY_SIZE:
+                pair = pair_program(x_kernel, y_kernel)
+            owned = False
+            if pair is not None:
+                program, names = pair
+                points = program(*(
+                    t_values if name == 't' else np.float64(params.get(name, MATH_CONSTANTS.get(name, 0.0)))
+                    for name in names
+                ))
+                # A full-length result is this call's own buffer, so its component views can be cleared in place
+                if points.shape == t_values.shape:
+                    x_values, y_values, owned = points.real, points.imag, True
+                else:
+                    x_values, y_values = np.broadcast_to(points.real, t_values.shape), np.broadcast_to(points.imag, t_values.shape)
+            else:
+                x_values = np.broadcast_to(x_kernel(arrays, params), t_values.shape)
+                y_values = np.broadcast_to(y_kernel(arrays, params), t_values.shape)
             
-            # Handle infinite values
-            x_values = np.where(np.isfinite(x_values), x_values, np.nan)
-            y_values = np.where(np.isfinite(y_values), y_values, np.nan)
+            # Handle infinite values; kernels that cannot produce any are left alone
+            if not x_kernel.finite:
+                x_values = nan_invalid(x_values, owned)
+            if not y_kernel.finite:
+                y_values = nan_invalid(y_values, owned)
             
             return x_values, y_values
             
@@ -590,7 +1682,7 @@ class ExpressionEvaluator:
             x_coords, y_coords = self.evaluate_parametric(x_expr, y_expr, t_range, num_points)
             
             # Generate t coordinates
-            t_coords = np.linspace(t_range[0], t_range[1], num_points)
+            t_coords = linspace_grid(t_range[0], t_range[1], num_points)
             
             return {
                 'x_coords': x_coords,
@@ -613,106 +1705,25 @@ class ExpressionEvaluator:
             
             result = latex_str.strip()
             
-            # Handle fractions \frac{numerator}{denominator}
-            import re
-            result = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'\1/\2', result)
-            
-            # Handle Greek letters
-            greek_letters = {
-                '\\alpha': 'alpha',
-                '\\beta': 'beta', 
-                '\\gamma': 'gamma',
-                '\\delta': 'delta',
-                '\\epsilon': 'epsilon',
-                '\\zeta': 'zeta',
-                '\\eta': 'eta',
-                '\\theta': 'theta',
-                '\\iota': 'iota',
-                '\\kappa': 'kappa',
-                '\\lambda': 'lambda',
-                '\\mu': 'mu',
-                '\\nu': 'nu',
-                '\\xi': 'xi',
-                '\\pi': 'pi',
-                '\\rho': 'rho',
-                '\\sigma': 'sigma',
-                '\\tau': 'tau',
-                '\\upsilon': 'upsilon',
-                '\\phi': 'phi',
-                '\\chi': 'chi',
-                '\\psi': 'psi',
-                '\\omega': 'omega',
-                '\\Alpha': 'Alpha',
-                '\\Beta': 'Beta',
-                '\\Gamma': 'Gamma',
-                '\\Delta': 'Delta',
-                '\\Epsilon': 'Epsilon',
-                '\\Zeta': 'Zeta',
-                '\\Eta': 'Eta',
-                '\\Theta': 'Theta',
-                '\\Iota': 'Iota',
-                '\\Kappa': 'Kappa',
-                '\\Lambda': 'Lambda',
-                '\\Mu': 'Mu',
-                '\\Nu': 'Nu',
-                '\\Xi': 'Xi',
-                '\\Pi': 'Pi',
-                '\\Rho': 'Rho',
-                '\\Sigma': 'Sigma',
-                '\\Tau': 'Tau',
-                '\\Upsilon': 'Upsilon',
-                '\\Phi': 'Phi',
-                '\\Chi': 'Chi',
-                '\\Psi': 'Psi',
-                '\\Omega': 'Omega'
-            }
-            
-            for latex_greek, ascii_greek in greek_letters.items():
-                result = result.replace(latex_greek, ascii_greek)
-            
-            # Handle mathematical operators
-            math_ops = {
-                '\\times': '*',
-                '\\cdot': '*',
-                '\\div': '/',
-                '\\pm': '+/-',
-                '\\mp': '-/+',
-                '\\leq': '<=',
-                '\\geq': '>=',
-                '\\neq': '!=',
-                '\\approx': '~=',
-                '\\equiv': '==',
-                '\\infty': 'inf',
-                '\\sum': 'sum',
-                '\\prod': 'prod',
-                '\\int': 'int',
-                '\\partial': 'd',
-                '\\nabla': 'grad',
-                '\\sin': 'sin',
-                '\\cos': 'cos',
-                '\\tan': 'tan',
-                '\\log': 'log',
-                '\\ln': 'ln',
-                '\\sqrt': 'sqrt'
-            }
-            
-            for latex_op, ascii_op in math_ops.items():
-                result = result.replace(latex_op, ascii_op)
+            # Only the superscript and subscript rewrites apply without a backslash
+            if '\\' in result:
+                # Handle fractions \frac{numerator}{denominator}
+                result = _LATEX_FRACTION_RE.sub(r'\1/\2', result)
+                
+                # Handle Greek letters and mathematical operators in one scan
+                result = _replace_latex_symbols(result)
             
             # Handle superscripts and subscripts
-            result = re.sub(r'\^{([^}]+)}', r'^\1', result)
-            result = re.sub(r'_{([^}]+)}', r'_\1', result)
+            if '{' in result:
+                result = _LATEX_SUPERSCRIPT_RE.sub(r'^\1', result)
+                result = _LATEX_SUBSCRIPT_RE.sub(r'_\1', result)
             
-            # Handle common parentheses
-            result = result.replace('\\left(', '(')
-            result = result.replace('\\right(', ')')
-            result = result.replace('\\left[', '[')
-            result = result.replace('\\right[', ']')
-            result = result.replace('\\left{', '{')
-            result = result.replace('\\right{', '}')
-            
-            # Remove extra backslashes
-            result = re.sub(r'\\(?![a-zA-Z{}^_])', '', result)
+            if '\\' in result:
+                # Handle common parentheses in one scan
+                result = _replace_latex_delimiters(result)
+                
+                # Remove extra backslashes
+                result = _STRAY_BACKSLASH_RE.sub('', result)
             
             return result
             
@@ -725,23 +1736,34 @@ class ExpressionEvaluator:
         Check if a value is a valid finite number
         Returns True for finite numbers, False for NaN, inf, or non-numeric types
         """
+        # Scalars are checked with math.isfinite; a NumPy ufunc call costs far more per value
+        if isinstance(value, float):
+            return math.isfinite(value)
         try:
-            import numpy as np
-            
-            # Check if it's a number type
-            if isinstance(value, (int, float, np.number)):
-                # Check if it's finite (not NaN or inf)
-                return np.isfinite(float(value))
-            else:
-                # Try to convert to float and check if finite
-                return np.isfinite(float(value))
+            # Ints too large for a float overflow and count as invalid
+            return math.isfinite(float(value))
         except (ValueError, TypeError, OverflowError):
             return False
     
-    def parse_and_classify_expression(self, expression: str) -> Dict[str, Any]:
+    def parse_and_classify_expression(self, expression: str, include_parts: bool = True) -> Dict[str, Any]:
         """
-        Parse expression and classify its type with detailed information
+        Parse expression and classify its type with detailed information.
+        Results are memoized per expression as immutable Classifications; each call
+        gets a fresh dict it may modify. Callers that do not read an implicit equation's
+        sides pass include_parts=False to leave out equation_parts.
+        """
+        return self._classify_cached(expression).to_dict(include_parts)
+    
+    def classify_batch(self, expressions: List[str], include_parts: bool = True) -> List[Dict[str, Any]]:
         """
+        parse_and_classify_expression for each expression, in input order. Each distinct
+        expression is classified once; repeats get their own copy of its result.
+        """
+        classified = {expression: self._classify_cached(expression) for expression in dict.fromkeys(expressions)}
+        return [classified[expression].to_dict(include_parts) for expression in expressions]
+    
+    def _classify_impl(self, expression: str) -> Classification:
+        """Uncached body of parse_and_classify_expression"""
         try:
             # Preprocess expression
             processed_expr = self.parser.preprocess_expression(expression)
@@ -751,98 +1773,49 @@ class ExpressionEvaluator:
             
             # For implicit equations, handle directly without AST parsing
             if expr_type == 'implicit':
-                if '=' not in processed_expr:
-                    return {
-                        'original_expression': expression,
-                        'processed_expression': processed_expr,
-                        'type': 'error',
-                        'variables': [],
-                        'is_valid': False,
-                        'error': 'Implicit equation must contain = sign',
-                        'primary_variable': None,
-                        'parameters': []
-                    }
-                
-                # Split into left and right sides
-                parts = processed_expr.split('=', 1)
-                if len(parts) != 2:
-                    return {
-                        'original_expression': expression,
-                        'processed_expression': processed_expr,
-                        'type': 'error',
-                        'variables': [],
-                        'is_valid': False,
-                        'error': 'Invalid implicit equation format',
-                        'primary_variable': None,
-                        'parameters': []
-                    }
-                
-                left_side = parts[0].strip()
-                right_side = parts[1].strip()
+                sides = _split_equation(processed_expr)
+                if sides is None:
+                    return Classification(expression, processed_expr, 'error', (), False,
+                                          'Implicit equation must contain = sign', None, ())
                 
-                # Extract variables from both sides
-                all_variables = set()
-                try:
-                    all_variables.update(self.parser.extract_variables(left_side))
-                    all_variables.update(self.parser.extract_variables(right_side))
-                except:
-                    # If variable extraction fails, do basic extraction
-                    import re
-                    all_variables.update(re.findall(r'\b[a-zA-Z]\b', processed_expr))
+                # Equations in single-letter names only need a scan; others are parsed side by side
+                all_variables = _letter_variables(processed_expr)
+                if all_variables is None:
+                    # Both sides in one parse, the same text the root bracketing compiles
+                    try:
+                        all_variables = _extract_variables(_equation_difference(*sides))
+                    except:
+                        # If variable extraction fails, do basic extraction
+                        all_variables = _single_letter_names(processed_expr)
                 
-                return {
-                    'original_expression': expression,
-                    'processed_expression': processed_expr,
-                    'type': 'implicit',
-                    'variables': list(all_variables),
-                    'is_valid': True,
-                    'error': None,
-                    'primary_variable': 'x' if 'x' in all_variables else None,
-                    'parameters': [v for v in all_variables if v not in ['x', 'y', 't']],
-                    'equation_parts': {
-                        'left': left_side,
-                        'right': right_side
-                    }
-                }
+                return Classification(
+                    expression, processed_expr, 'implicit', tuple(all_variables), True, None,
+                    'x' if 'x' in all_variables else None, tuple(all_variables - AXIS_NAMES),
+                    equation_parts=sides
+                )
             
-            # For explicit expressions, use normal parsing
-            variables = self.parser.extract_variables(processed_expr)
+            # For explicit expressions, use normal parsing; the frozen set is only read here
+            variables = _extract_variables(processed_expr)
             is_valid, error_msg = self.parser.validate_expression(processed_expr)
             
-            result = {
-                'original_expression': expression,
-                'processed_expression': processed_expr,
-                'type': expr_type,
-                'variables': list(variables),
-                'is_valid': is_valid,
-                'error': error_msg,
-                'primary_variable': 'x' if 'x' in variables else None,
-                'parameters': [v for v in variables if v not in ['x', 'y', 't']]
-            }
-            
-            return result
+            return Classification(
+                expression, processed_expr, expr_type, tuple(variables), is_valid, error_msg,
+                'x' if 'x' in variables else None, tuple(variables - AXIS_NAMES),
+                is_numexpr_safe=self.parser.is_numexpr_safe(processed_expr)
+            )
             
         except Exception as e:
-            return {
-                'original_expression': expression,
-                'processed_expression': expression,
-                'type': 'error',
-                'variables': [],
-                'is_valid': False,
-                'error': f'Parse error: {str(e)}',
-                'primary_variable': None,
-                'parameters': []
-            }
+            return Classification(expression, expression, 'error', (), False, f'Parse error: {str(e)}', None, ())
     
     def _parse_implicit_equation(self, equation: str) -> Dict[str, str]:
         """Parse implicit equation into left and right parts (internal method)"""
-        if '=' not in equation:
+        sides = _split_equation(equation)
+        if sides is None:
             return {'left': equation, 'right': '0'}
         
-        parts = equation.split('=', 1)
         return {
-            'left': parts[0].strip(),
-            'right': parts[1].strip()
+            'left': sides[0],
+            'right': sides[1]
         }
     
     def _parse_parametric_expression(self, expression: str) -> Dict[str, str]:
@@ -854,42 +1827,94 @@ class ExpressionEvaluator:
         }
     
     def generate_graph_data(self, expression: str, x_range: Tuple[float, float] = (-30, 30), 
-                          num_points: int = 1000, params: Dict[str, float] = None) -> Dict[str, Any]:
-        """Generate coordinate data for graphing an expression (with preprocessing)"""
+                          num_points: int = 1000, params: Dict[str, float] = None,
+                          layout: str = "aos", dtype: type = np.float64) -> Dict[str, Any]:
+        """
+        Generate coordinate data for graphing an expression (with preprocessing)
+        layout 'aos' returns a list of point dicts, 'soa' returns parallel x/y arrays.
+        x is the shared read-only grid and y the kernel's own output, so the only
+        copies made are the filtered points when some of them are not finite.
+        Infinities are not rewritten to NaN first, since the filter drops both.
+        Hot kernels under Numba do all of this in one compiled loop (CompiledExpression.sample).
+        dtype np.float32 samples and evaluates in single precision.
+        """
         try:
             # Preprocess the expression to handle implicit multiplication
             processed_expression = self.parser.preprocess_expression(expression)
+            kernel = compile_kernel(processed_expression, dtype)
+            # Expressions that do not vary with x have no curve to plot
+            if 'x' not in kernel.names:
+                raise ValueError("Expression does not depend on x")
             
-            # Generate x coordinates
-            x_values = np.linspace(x_range[0], x_range[1], num_points)
+            # Sample, evaluate and keep the finite points, fused into one loop for hot kernels
+            x_valid, y_valid, y_range = kernel.sample(x_range, num_points, params)
             
-            # Evaluate expression
-            y_values = self.evaluate_expression(processed_expression, x_values, params)
-            
-            # Filter out invalid points (NaN, infinite)
-            valid_mask = np.isfinite(y_values)
-            x_valid = x_values[valid_mask]
-            y_valid = y_values[valid_mask]
-            
-            # Create coordinate pairs
-            coordinates = []
-            for i in range(len(x_valid)):
-                coordinates.append({
-                    'x': float(x_valid[i]),
-                    'y': float(y_valid[i])
-                })
-            
-            return {
-                'coordinates': coordinates,
-                'total_points': len(x_values),
-                'valid_points': len(x_valid),
-                'x_range': x_range,
-                'y_range': [float(np.nanmin(y_values)), float(np.nanmax(y_values))] if len(y_valid) > 0 else [0, 0]
-            }
+            return self._layout_points(x_valid, y_valid, num_points, x_range, y_range, layout)
             
         except Exception as e:
             raise ValueError(f"Failed to generate graph data: {e}")
     
+    def _graph_data(self, x_values: np.ndarray, y_values: np.ndarray, x_range: Tuple[float, float],
+                    layout: str = "aos") -> Dict[str, Any]:
+        """Filter evaluated points to the finite ones and lay them out as graph data"""
+        # Filter out invalid points (NaN, infinite)
+        # Constant expressions evaluate to a scalar; spread it over the grid
+        # y_range comes out of the same summary pass that counts the finite points
+        x_valid, y_valid, y_range = keep_finite_range(x_values, np.broadcast_to(y_values, np.shape(x_values)))
+        return self._layout_points(x_valid, y_valid, len(x_values), x_range, y_range, layout)
+    
+    def _layout_points(self, x_valid: np.ndarray, y_valid: np.ndarray, total_points: int,
+                       x_range: Tuple[float, float], y_range: Optional[Tuple[float, float]],
+                       layout: str = "aos") -> Dict[str, Any]:
+        """Lay out finite points as graph data; y_range is None when there are none"""
+        # Create coordinate pairs from one C-level conversion per axis;
+        # 'soa' keeps the arrays for orjson's native numpy serialization
+        if layout == "soa":
+            points = {'coordinates': [], 'x': x_valid, 'y': y_valid}
+        else:
+            points = {'coordinates': [{'x': x, 'y': y} for x, y in zip(x_valid.tolist(), y_valid.tolist())]}
+        
+        return {
+            **points,
+            'total_points': total_points,
+            'valid_points': len(x_valid),
+            'x_range': x_range,
+            'y_range': list(y_range) if y_range is not None else [0, 0]
+        }
+    
+    def evaluate_batch(self, expressions: List[str], x_range: Tuple[float, float] = (-30, 30),
+                       num_points: int = 1000, params: Dict[str, float] = None) -> List[Union[np.ndarray, Exception]]:
+        """
+        Evaluate y = f(x) for expressions sharing one x grid and parameter set.
+        The grid and argument bindings are built once for the whole batch; a failing
+        expression yields its ValueError in place so the rest still evaluate.
+        """
+        x_values = linspace_grid(x_range[0], x_range[1], num_points)
+        arrays = {'x': x_values}
+        params = params or {}
+        
+        results = []
+        for expression in expressions:
+            try:
+                kernel = compile_kernel(self.parser.preprocess_expression(expression))
+                y_values = kernel(arrays, params)
+                if np.shape(y_values) != x_values.shape:
+                    y_values = np.broadcast_to(y_values, x_values.shape)
+                results.append(y_values if kernel.finite else nan_invalid(y_values))
+            except Exception as e:
+                results.append(ValueError(f"Expression evaluation failed: {e}"))
+        return results
+    
+    def generate_batch_graph_data(self, expressions: List[str], x_range: Tuple[float, float] = (-30, 30),
+                                  num_points: int = 1000, params: Dict[str, float] = None,
+                                  layout: str = "aos") -> List[Union[Dict[str, Any], Exception]]:
+        """Graph data for each expression of a batch, with failures returned in place"""
+        x_values = linspace_grid(x_range[0], x_range[1], num_points)
+        return [
+            y_values if isinstance(y_values, Exception) else self._graph_data(x_values, y_values, x_range, layout)
+            for y_values in self.evaluate_batch(expressions, x_range, num_points, params)
+        ]
+    
     def evaluate_3d_surface(self, expression: str, x_range: Tuple[float, float], 
                            y_range: Tuple[float, float], resolution: int = 50, 
                            params: Dict[str, float] = None) -> Tuple[List[Tuple[float, float, float]], Tuple[float, float]]:
@@ -897,43 +1922,51 @@ class ExpressionEvaluator:
         Evaluate 3D surface z = f(x, y)
         Returns list of (x, y, z) coordinates and z range
         """
+        points, z_range = self.surface_points(expression, x_range, y_range, resolution, params)
+        return [tuple(point) for point in points.tolist()], z_range
+    
+    def evaluate_surface(self, expression: str, x_range: Tuple[float, float],
+                         y_range: Tuple[float, float], resolution: int = 50,
+                         params: Dict[str, float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evaluate z = f(x, y) over the whole grid in one compiled call
+        Returns the shared read-only X, Y meshes and Z, with NaN where z is not finite
+        """
+        # Compile once; numexpr evaluates the grid in cache-sized blocks
+        kernel = compile_kernel(self.parser.preprocess_expression(expression))
+        require_bound(kernel, ('x', 'y'), params)
+        
+        # Create grid
+        X, Y = mesh_grid(x_range[0], x_range[1], y_range[0], y_range[1], resolution)
+        
+        # Evaluate z = f(x, y)
+        Z = kernel({'x': X, 'y': Y}, params)
+        if np.shape(Z) != X.shape:
+            Z = np.broadcast_to(Z, X.shape)
+        return X, Y, Z if kernel.finite else nan_invalid(Z)
+    
+    def surface_points(self, expression: str, x_range: Tuple[float, float],
+                       y_range: Tuple[float, float], resolution: int = 50,
+                       params: Dict[str, float] = None) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """
+        Evaluate 3D surface z = f(x, y)
+        Returns an (n, 3) array of the finite (x, y, z) points and z range
+        """
         try:
-            # Preprocess expression
-            processed_expression = self.parser.preprocess_expression(expression)
+            X, Y, Z = self.evaluate_surface(expression, x_range, y_range, resolution, params)
             
-            # Create grid
-            x_values = np.linspace(x_range[0], x_range[1], resolution)
-            y_values = np.linspace(y_range[0], y_range[1], resolution)
-            X, Y = np.meshgrid(x_values, y_values)
+            # z range as Python floats from one summary pass (NaN when nothing is finite)
+            count, z_low, z_high = finite_summary(Z.reshape(-1))
+            z_range = (z_low, z_high)
             
-            # Prepare evaluation context
-            context = {
-                'x': X,
-                'y': Y,
-                **MATH_FUNCTIONS,
-                **MATH_CONSTANTS,
-                **(params or {})
-            }
-            
-            # Evaluate z = f(x, y)
-            Z = ne.evaluate(self.parser.compile_expression(processed_expression), local_dict=context)
-            
-            # Handle infinite values
-            Z = np.where(np.isfinite(Z), Z, np.nan)
-            
-            # Calculate z range
-            z_min = float(np.nanmin(Z))
-            z_max = float(np.nanmax(Z))
-            
-            # Create coordinate list
-            coordinates = []
-            for i in range(resolution):
-                for j in range(resolution):
-                    x, y, z = float(X[i, j]), float(Y[i, j]), float(Z[i, j])
-                    if not np.isnan(z):
-                        coordinates.append((x, y, z))
+            # Keep the finite z values; the kept indices are found once and gathered per axis
+            if count == Z.size:
+                points = np.column_stack((X.reshape(-1), Y.reshape(-1), Z.reshape(-1)))
+            else:
+                kept = np.flatnonzero(finite_mask(Z))
+                points = np.column_stack((X.take(kept), Y.take(kept), Z.take(kept)))
             
-            return coordinates, (z_min, z_max)
+            return points, z_range
             
         except Exception as e:
             raise ValueError(f"3D surface evaluation failed: {e}")
@@ -945,50 +1978,49 @@ class ExpressionEvaluator:
         Evaluate 3D parametric surface x(u, v), y(u, v), z(u, v)
         Returns list of (x, y, z) coordinates and z range
         """
+        points, z_range = self.parametric_surface_points(x_expr, y_expr, z_expr, u_range, v_range, resolution, params)
+        return [tuple(point) for point in points.tolist()], z_range
+    
+    def parametric_surface_points(self, x_expr: str, y_expr: str, z_expr: str,
+                                  u_range: Tuple[float, float], v_range: Tuple[float, float],
+                                  resolution: int = 50, params: Dict[str, float] = None) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """
+        Evaluate 3D parametric surface x(u, v), y(u, v), z(u, v)
+        Returns an (n, 3) array of the points finite in all three components and z range
+        """
         try:
-            # Preprocess expressions
-            x_expr = self.parser.preprocess_expression(x_expr)
-            y_expr = self.parser.preprocess_expression(y_expr)
-            z_expr = self.parser.preprocess_expression(z_expr)
-            
             # Create parameter grid
-            u_values = np.linspace(u_range[0], u_range[1], resolution)
-            v_values = np.linspace(v_range[0], v_range[1], resolution)
-            U, V = np.meshgrid(u_values, v_values)
+            U, V = mesh_grid(u_range[0], u_range[1], v_range[0], v_range[1], resolution)
             
-            # Prepare evaluation context
-            context = {
-                'u': U, 'v': V,
-                **MATH_FUNCTIONS, **MATH_CONSTANTS,
-                **(params or {})
-            }
+            # Evaluate parametric equations with compiled kernels
+            kernels = [compile_kernel(self.parser.preprocess_expression(expr)) for expr in (x_expr, y_expr, z_expr)]
+            for kernel in kernels:
+                require_bound(kernel, ('u', 'v'), params)
+            X, Y, Z = (np.broadcast_to(kernel({'u': U, 'v': V}, params), U.shape) for kernel in kernels)
             
-            # Evaluate parametric equations
-            X = ne.evaluate(self.parser.compile_expression(x_expr), local_dict=context)
-            Y = ne.evaluate(self.parser.compile_expression(y_expr), local_dict=context)
-            Z = ne.evaluate(self.parser.compile_expression(z_expr), local_dict=context)
+            # Keep points finite in all three components
+            valid_mask = np.isfinite(X)
+            valid_mask &= np.isfinite(Y)
+            valid_mask &= np.isfinite(Z)
+            kept = np.flatnonzero(valid_mask)
+            z_values = Z.take(kept)
+            points = np.column_stack((X.take(kept), Y.take(kept), z_values))
             
-            # Handle infinite values
-            X = np.where(np.isfinite(X), X, np.nan)
-            Y = np.where(np.isfinite(Y), Y, np.nan)
-            Z = np.where(np.isfinite(Z), Z, np.nan)
+            # Calculate z range over the contiguous kept values rather than the strided column
+            z_range = (float(z_values.min()), float(z_values.max())) if z_values.size else (float('nan'), float('nan'))
             
-            # Calculate z range
-            z_min = float(np.nanmin(Z))
-            z_max = float(np.nanmax(Z))
-            
-            # Create coordinate list
-            coordinates = []
-            for i in range(resolution):
-                for j in range(resolution):
-                    x, y, z = float(X[i, j]), float(Y[i, j]), float(Z[i, j])
-                    if not (np.isnan(x) or np.isnan(y) or np.isnan(z)):
-                        coordinates.append((x, y, z))
-            
-            return coordinates, (z_min, z_max)
+            return points, z_range
             
         except Exception as e:
             raise ValueError(f"3D parametric evaluation failed: {e}")
 
-# Global evaluator instance
-evaluator = ExpressionEvaluator()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_evaluator() -> ExpressionEvaluator:
+    """The shared evaluator, built on first use rather than at import"""
+    return ExpressionEvaluator()
+
+def __getattr__(name: str) -> Any:
+    # `evaluator` stays importable as the shared instance without constructing it at import time
+    if name == 'evaluator':
+        return get_evaluator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,10 +8,13 @@ import uvicorn
 import os
 from dotenv import load_dotenv
 
-from backend.api.endpoints import router
+from backend.api.endpoints import router, OrjsonResponse
 from backend.core.config import settings
 from backend.core.cache import init_cache
 
+# Liveness probe body, serialized once
+_HEALTH_BYTES = b'{"status":"healthy"}'
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize cache on startup
@@ -23,6 +26,7 @@ app = FastAPI(
     title="Grapher API",
     description="Mathematical expression evaluation and graphing API",
     version="1.0.0",
+    default_response_class=OrjsonResponse,
     lifespan=lifespan
 )
 
@@ -61,7 +65,7 @@ async def serve_frontend():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 if __name__ == "__main__":
     load_dotenv()
@@ -266,6 +266,73 @@ class TestBatchEvaluateEndpoint:
         })
         # The API returns 400 if any expression is completely invalid
         assert response.status_code == 400
+    
+    def test_batch_evaluate_preserves_order_across_workers(self):
+        """Results come back in request order when split across worker threads"""
+        expressions = [f"{i}*x" for i in range(20)]
+        response = client.post("/api/batch-evaluate", json={
+            "expressions": expressions,
+            "variables": {},
+            "x_range": [0, 1],
+            "num_points": 10
+        })
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["expression"] for result in results] == expressions
+        assert [result["graph_data"]["coordinates"][-1]["y"] for result in results] == list(range(20))
+    
+    def test_batch_evaluate_duplicate_expressions(self):
+        """Duplicate expressions are evaluated once and returned at every position"""
+        response = client.post("/api/batch-evaluate", json={
+            "expressions": ["x^2", "sin(x)", "x^2", "x^2"],
+            "variables": {},
+            "x_range": [-1, 1],
+            "num_points": 10
+        })
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["expression"] for result in results] == ["x^2", "sin(x)", "x^2", "x^2"]
+        assert results[0] == results[2] == results[3]
+    
+    def test_single_expression_helper_takes_primitives(self):
+        """The batch helper and its request adapter produce the same response"""
+        from backend.api.endpoints import evaluate_single_expression_async, evaluate_request_async
+        from backend.api.models import ExpressionRequest
+        
+        direct = asyncio.run(evaluate_single_expression_async("x^2", {}, (-1, 1), 10))
+        adapted = asyncio.run(evaluate_request_async(
+            ExpressionRequest(expression="x^2", x_range=(-1, 1), num_points=10)
+        ))
+        assert direct.graph_data.coordinates == adapted.graph_data.coordinates
+        assert len(direct.graph_data.coordinates) == 10
+    
+    def test_single_expression_remembered_failure(self):
+        """A failure is cached once and reported again as the same 400"""
+        from fastapi import HTTPException
+        from backend.api.endpoints import evaluate_single_expression_async
+        from backend.core.cache import MemoryCache
+        cache = MemoryCache()
+        with patch("backend.core.cache.cache", cache):
+            with pytest.raises(HTTPException) as first:
+                asyncio.run(evaluate_single_expression_async("invalid_expr +", {}, (-1, 1), 10))
+            entries = dict(cache._cache)
+            with pytest.raises(HTTPException) as second:
+                asyncio.run(evaluate_single_expression_async("invalid_expr +", {}, (-1, 1), 10))
+        assert first.value.status_code == second.value.status_code == 400
+        assert first.value.detail == second.value.detail
+        # The hit neither rewrote the entry nor restarted its TTL
+        assert cache._cache == entries
+    
+    def test_batch_evaluate_remembered_failure(self):
+        """A batch repeating a failed expression reports that expression's error both times"""
+        from backend.core.cache import MemoryCache
+        payload = {"expressions": ["x^2", "invalid_expr +"], "x_range": [-1, 1], "num_points": 10}
+        with patch("backend.core.cache.cache", MemoryCache()):
+            first = client.post("/api/batch-evaluate", json=payload)
+            second = client.post("/api/batch-evaluate", json=payload)
+        assert first.status_code == second.status_code == 400
+        assert first.json()["detail"] == second.json()["detail"]
+        assert "validation error" not in first.json()["detail"]
 
 
 class TestUpdateParametersEndpoint:
@@ -299,6 +366,55 @@ class TestUpdateParametersEndpoint:
             "x_range": [-10, 10]
         })
         assert response.status_code == 400
+    
+    def test_update_parameters_etag(self):
+        """Test unchanged parameters short-circuit with 304 Not Modified"""
+        payload = {"expression": "a*x", "variables": {"a": 2.0}, "x_range": [-1, 1]}
+        first = client.post("/api/update-params", json=payload)
+        etag = first.headers["etag"]
+        
+        unchanged = client.post("/api/update-params", json=payload, headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.headers["etag"] == etag
+        
+        changed = client.post("/api/update-params", json={**payload, "variables": {"a": 3.0}},
+                              headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+    
+    def test_update_parameters_runs_on_worker_pool(self):
+        """Evaluation and encoding happen off the event loop"""
+        import threading
+        from backend.core.math_engine import ExpressionEvaluator
+        threads = []
+        generate = ExpressionEvaluator.generate_graph_data
+        
+        def recording_generate(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return generate(self, *args, **kwargs)
+        
+        with patch.object(ExpressionEvaluator, "generate_graph_data", recording_generate):
+            response = client.post("/api/update-params", json={
+                "expression": "a*x^2", "variables": {"a": 1.5}, "x_range": [-2, 2]
+            })
+        assert response.status_code == 200
+        assert response.json()["graph_data"]["valid_points"] == 1000
+        assert len(threads) == 1 and threads[0].startswith("grapher-eval")
+    
+    def test_update_parameters_then_batch(self):
+        """Cached update-params bodies are not read back as batch graph data"""
+        from backend.core.cache import MemoryCache
+        payload = {"expression": "a*x - 3", "variables": {"a": 2.0}, "x_range": [-1, 1]}
+        with patch("backend.core.cache.cache", MemoryCache()):
+            assert client.post("/api/update-params", json=payload).status_code == 200
+            response = client.post("/api/batch-evaluate", json={
+                "expressions": [payload["expression"]],
+                "variables": payload["variables"],
+                "x_range": payload["x_range"],
+                "num_points": 1000
+            })
+        assert response.status_code == 200
+        assert response.json()["results"][0]["graph_data"]["valid_points"] == 1000
 
 
 class TestParametricEndpoint:
@@ -354,6 +470,43 @@ class TestParametricEndpoint:
         assert response.status_code == 422
 
 
+class TestParseCache:
+    """Test memoization of expression classification"""
+    
+    def test_classification_is_memoized(self):
+        """Repeated evaluations of one expression classify it once"""
+        from backend.api.endpoints import classify_expression
+        client.post("/api/cache/clear")
+        for a in (1, 2, 3):
+            response = client.post("/api/evaluate", json={"expression": "a*x^2", "variables": {"a": a}})
+            assert response.status_code == 200
+        info = classify_expression.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+    
+    def test_cache_clear_endpoint(self):
+        """The clear endpoint empties the parse cache"""
+        from backend.api.endpoints import classify_expression
+        client.post("/api/parse", json={"expression": "x^3"})
+        response = client.post("/api/cache/clear")
+        assert response.status_code == 200
+        assert response.json() == {"status": "cleared"}
+        assert classify_expression.cache_info().currsize == 0
+    
+    def test_cache_clear_reaches_evaluator_caches(self):
+        """Per-evaluator classification and validation caches and compiled kernels are cleared too"""
+        from backend.core.math_engine import compile_kernel, get_evaluator
+        evaluator = get_evaluator()
+        evaluator.parse_and_classify_expression("x^4")
+        evaluator.parser.validate_expression("x^4")
+        kernel = compile_kernel("x**4")
+        client.post("/api/cache/clear")
+        assert evaluator._classify_cached.cache_info().currsize == 0
+        assert evaluator.parser._validate_cached.cache_info().currsize == 0
+        assert not evaluator.parser.preprocessed_expressions
+        assert compile_kernel("x**4") is not kernel
+
+
 class TestHealthEndpoint:
     """Test the /api/health endpoint"""
     
@@ -15,7 +15,7 @@ import os
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from backend.core.cache import MemoryCache, generate_cache_key
+from backend.core.cache import MemoryCache, generate_cache_key, jittered_ttl, negative_entry, is_negative_entry
 
 
 class TestMemoryCache:
@@ -163,6 +163,50 @@ class TestMemoryCache:
         assert len(results) == 10
         for i, result in enumerate(results):
             assert result["result"] == i
+    
+    @pytest.mark.asyncio
+    async def test_cache_mset_and_mget(self):
+        """Test bulk set and get preserve key order and report misses as None"""
+        cache = MemoryCache()
+        
+        await cache.mset({"bulk_a": {"result": 1}, "bulk_b": {"result": 2}})
+        results = await cache.mget(["bulk_b", "missing", "bulk_a"])
+        
+        assert results == [{"result": 2}, None, {"result": 1}]
+    
+    @pytest.mark.asyncio
+    async def test_cache_mget_expired(self):
+        """Test bulk get drops expired entries"""
+        cache = MemoryCache()
+        
+        await cache.mset({"bulk_expired": {"result": 1}}, ttl=-1)
+        
+        assert await cache.mget(["bulk_expired"]) == [None]
+        assert "bulk_expired" not in cache._cache
+    
+    @pytest.mark.asyncio
+    async def test_cache_response_bytes(self):
+        """Test encoded response bodies are returned as stored and other values are misses"""
+        cache = MemoryCache()
+        
+        await cache.set("body", b'{"result":1}')
+        await cache.set("object", {"result": 1})
+        
+        assert await cache.get_response_bytes("body") == b'{"result":1}'
+        assert await cache.get_response_bytes("object") is None
+        assert await cache.get_response_bytes("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_cache_sweeps_expired_entries(self):
+        """Test expired entries are dropped by periodic sweeps even if never read"""
+        cache = MemoryCache()
+        
+        await cache.set("stale", {"result": 1}, ttl=-1)
+        for i in range(MemoryCache.SWEEP_INTERVAL):
+            await cache.set(f"fresh_{i}", {"result": i})
+        
+        assert "stale" not in cache._cache
+        assert len(cache._cache) == MemoryCache.SWEEP_INTERVAL
 
 
 class TestCacheFunctions:
@@ -180,7 +224,7 @@ class TestCacheFunctions:
         key2 = generate_cache_key(expression, params, x_range)
         assert key == key2
         
-        # Key should be MD5 hash (32 characters)
+        # Key should be a 128-bit BLAKE2b hex digest (32 characters)
         assert len(key) == 32
         assert all(c in '0123456789abcdef' for c in key)
     
@@ -218,6 +262,51 @@ class TestCacheFunctions:
         # All should be different
         assert key1 != key2 != key3
     
+    def test_generate_cache_key_range_sequence_type(self):
+        """Test ranges given as lists and tuples share a key"""
+        assert generate_cache_key("x^2", {}, [-10, 10]) == generate_cache_key("x^2", {}, (-10, 10))
+    
+    def test_generate_cache_key_param_order(self):
+        """Test parameter insertion order does not affect the key"""
+        assert generate_cache_key("a*x+b", {"a": 1.0, "b": 2.0}) == generate_cache_key("a*x+b", {"b": 2.0, "a": 1.0})
+    
+    def test_generate_cache_key_layout(self):
+        """Test non-default layouts get their own keys without changing default keys"""
+        key = generate_cache_key("x^2", {}, (-10, 10))
+        
+        assert generate_cache_key("x^2", {}, (-10, 10), "aos") == key
+        assert generate_cache_key("x^2", {}, (-10, 10), "soa") != key
+    
+    def test_generate_cache_key_num_points(self):
+        """Test results sampled at different resolutions get different keys"""
+        key_100 = generate_cache_key("x^2", {}, (-10, 10), num_points=100)
+        key_1000 = generate_cache_key("x^2", {}, (-10, 10), num_points=1000)
+        
+        assert key_100 != key_1000
+        assert key_100 == generate_cache_key("x^2", {}, (-10, 10), num_points=100)
+    
+    def test_generate_cache_key_kind(self):
+        """Test entries of another kind never share a key with graph data"""
+        key = generate_cache_key("x^2", {}, (-10, 10), num_points=1000)
+        assert generate_cache_key("x^2", {}, (-10, 10), num_points=1000, kind="bytes") != key
+    
+    def test_jittered_ttl_bounds(self):
+        """Test TTL jitter stays within the requested spread"""
+        ttls = {jittered_ttl(1000, 0.1) for _ in range(200)}
+        
+        assert all(900 <= ttl <= 1100 for ttl in ttls)
+        assert len(ttls) > 1
+        assert jittered_ttl(1, 0.5) >= 1
+    
+    def test_negative_entry(self):
+        """Test failed evaluations are recognizable in the cache"""
+        entry = negative_entry("Invalid expression")
+        
+        assert is_negative_entry(entry)
+        assert entry["error"] == "Invalid expression"
+        assert not is_negative_entry(None)
+        assert not is_negative_entry({"result": 1})
+    
     @pytest.mark.asyncio
     async def test_cache_mathematical_expression(self):
         """Test caching mathematical expression results"""
@@ -456,15 +545,12 @@ class TestCacheErrorHandling:
             result = await cache.get(key)
             assert result["expression"] == expr
     
-    @patch('backend.core.cache.datetime')
+    @patch('backend.core.cache.monotonic')
     @pytest.mark.asyncio
-    async def test_cache_time_manipulation(self, mock_datetime):
+    async def test_cache_time_manipulation(self, mock_monotonic):
         """Test cache behavior with controlled time"""
-        from datetime import datetime as real_datetime
-        
         # Setup mock time
-        fixed_time = real_datetime(2023, 1, 1, 12, 0, 0)
-        mock_datetime.now.return_value = fixed_time
+        mock_monotonic.return_value = 1000.0
         
         cache = MemoryCache()
         key = "time_test"
@@ -477,8 +563,7 @@ class TestCacheErrorHandling:
         assert await cache.get(key) == value
         
         # Advance time beyond TTL
-        future_time = real_datetime(2023, 1, 1, 13, 0, 1)  # 1 hour and 1 second later
-        mock_datetime.now.return_value = future_time
+        mock_monotonic.return_value = 1000.0 + 3601  # 1 hour and 1 second later
         
         # Should be expired
         assert await cache.get(key) is None
\ No newline at end of file
@@ -0,0 +1,636 @@
+"""
+Compiled expression kernel tests.
+Tests kernel caching, argument binding and parity with the evaluator.
+"""
+
+import ast
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the src directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backend.core.math_engine import (
+    ExpressionEvaluator, ExpressionParser, CompiledExpression, compile_fallback, compile_kernel, jit_compile, jit_sampler, linspace_grid, mesh_grid,
+    unit_circle,
+    all_finite, finite_mask, finite_summary, keep_finite, keep_finite_range, nan_invalid, pair_program, parse_tree, polynomial_coefficients, unsupported_construct, ALLOWED_NODES, NUMEXPR_FUNCTIONS, RESERVED_NAMES, _analyze_expression, _letter_variables, _single_letter_names
+)
+
+
+class TestCompiledKernels:
+    """Test compile-once expression kernels"""
+
+    def setup_method(self):
+        """Set up ExpressionEvaluator instance for each test"""
+        self.engine = ExpressionEvaluator()
+
+    def test_kernel_is_cached_per_expression(self):
+        """Compiling the same expression twice returns the same kernel"""
+        assert compile_kernel("a*x**2 + b") is compile_kernel("a*x**2 + b")
+        assert compile_kernel("a*x**2 + b") is not compile_kernel("a*x**2 + c")
+
+    def test_kernel_cache_ignores_how_dtype_is_passed(self):
+        """Default, positional and keyword float64 share one kernel; float32 gets its own"""
+        kernel = compile_kernel("a*x + 7")
+        assert compile_kernel("a*x + 7", np.float64) is kernel
+        assert compile_kernel("a*x + 7", dtype=np.float64) is kernel
+        single = compile_kernel("a*x + 7", np.float32)
+        assert single is not kernel and single.dtype is np.float32
+        assert compile_kernel("a*x + 7", dtype=np.float32) is single
+
+    def test_single_precision_kernel_runs_numexpr(self):
+        """float32 kernels build a numexpr program and return float32"""
+        kernel = compile_kernel("sin(x)*2.5 + a", np.float32)
+        assert kernel._program is not None
+        x = np.linspace(-1, 1, 2048, dtype=np.float32)
+        y = kernel({'x': x}, {'a': 1.0})
+        assert y.dtype == np.float32
+        np.testing.assert_allclose(y, np.sin(x.astype(np.float64)) * 2.5 + 1.0, atol=1e-6)
+
+    def test_small_list_inputs_are_bound_as_arrays(self):
+        """Short list inputs take the NumPy path like arrays do"""
+        kernel = compile_kernel("a*x + sin(x)")
+        np.testing.assert_allclose(kernel({'x': [1.0, 2.0]}, {'a': 3.0}), 3.0 * np.array([1.0, 2.0]) + np.sin([1.0, 2.0]))
+
+    def test_kernel_argument_names(self):
+        """Only variables and constants become arguments, never called functions"""
+        kernel = compile_kernel("sin(x)*pi + a")
+        assert kernel.names == ('a', 'pi', 'x')
+
+    def test_kernel_binding_precedence(self):
+        """Arrays override params, params override constants, missing names are 0"""
+        x = np.array([1.0, 2.0])
+        kernel = compile_kernel("x + a + e")
+        np.testing.assert_allclose(kernel({'x': x}, {'a': 1.0}), x + 1.0 + np.e)
+        np.testing.assert_allclose(kernel({'x': x}, {'e': 0.0}), x)
+        np.testing.assert_allclose(kernel({'x': x}), x + np.e)
+
+    def test_parser_caches_by_expression_text(self):
+        """Rewritten expressions are cached under their source text"""
+        parser = self.engine.parser
+        compiled = parser.compile_expression("x^2 + 1")
+        assert parser.compiled_expressions["x^2 + 1"] == compiled == "x**2 + 1"
+        assert parser.compile_expression("x^2 + 1") is compiled
+
+    def test_preprocessing_is_cached_and_bounded(self):
+        """Preprocessed text is reused per source expression and the oldest entries are evicted"""
+        parser = ExpressionParser()
+        processed = parser.preprocess_expression("2sinx")
+        assert processed == "2*sin(x)"
+        assert parser.preprocess_expression("2sinx") is processed
+
+        for i in range(ExpressionParser.CACHE_SIZE):
+            parser.preprocess_expression(f"x + {i}")
+        assert "2sinx" not in parser.preprocessed_expressions
+        assert len(parser.preprocessed_expressions) == ExpressionParser.CACHE_SIZE
+
+    def test_preprocessing_compiles_no_patterns(self, monkeypatch):
+        """Every rewrite pattern is compiled at import, so new input compiles nothing"""
+        parser = ExpressionParser()
+
+        def forbid(*args, **kwargs):
+            raise AssertionError("pattern compiled while preprocessing")
+
+        monkeypatch.setattr("re.compile", forbid)
+        monkeypatch.setattr("re._compile", forbid)
+        assert parser.preprocess_expression("2xsin(x)cosy + \\frac{1}{2}") == "2*x*sin(x)*cos(y) + (1)/(2)"
+        assert parser.parse_expression_type("x(t) + 1") == "parametric"
+
+    def test_preprocessing_cache_keeps_recently_used(self):
+        """A cache hit protects an entry from the next eviction"""
+        parser = ExpressionParser()
+        for i in range(ExpressionParser.CACHE_SIZE):
+            parser.preprocess_expression(f"x + {i}")
+        parser.preprocess_expression("x + 0")
+        parser.preprocess_expression("2sinx")
+        assert "x + 0" in parser.preprocessed_expressions
+        assert "x + 1" not in parser.preprocessed_expressions
+
+    def test_classification_is_memoized_and_copied(self):
+        """Repeated classification reuses one result but hands out independent copies"""
+        first = self.engine.parse_and_classify_expression("a*x^2 + 1")
+        first['variables'].append("z")
+        first['type'] = 'error'
+        second = self.engine.parse_and_classify_expression("a*x^2 + 1")
+        assert sorted(second['variables']) == ["a", "x"]
+        assert second['type'] != 'error'
+        assert self.engine._classify_cached.cache_info().hits >= 1
+
+    def test_classify_batch_keeps_input_order(self):
+        """Batch classification matches one-by-one results, repeats included"""
+        expressions = ["x^2", "x + y = 1", "x^2", "__import__('os')"]
+        results = self.engine.classify_batch(expressions)
+        assert results == [self.engine.parse_and_classify_expression(e) for e in expressions]
+        assert results[0] is not results[2]
+
+    def test_classification_keys_follow_expression_kind(self):
+        """Implicit results carry their sides, explicit ones the numexpr flag"""
+        implicit = self.engine.parse_and_classify_expression("x + y = 4")
+        assert implicit['equation_parts'] == {'left': "x + y", 'right': "4"}
+        assert 'is_numexpr_safe' not in implicit
+        assert 'equation_parts' not in self.engine.parse_and_classify_expression("x + y = 4", include_parts=False)
+        explicit = self.engine.parse_and_classify_expression("sin(x)")
+        assert explicit['is_numexpr_safe'] and 'equation_parts' not in explicit
+
+    def test_validation_is_memoized(self):
+        """Repeated validation of the same text reuses the first result"""
+        parser = ExpressionParser()
+        assert parser.validate_expression("a*x") == (True, None)
+        assert parser.validate_expression("a*x") == (True, None)
+        assert parser._validate_cached.cache_info().hits == 1
+
+    def test_implicit_variables_parse_both_sides_once(self):
+        """Multi-letter equations are analyzed as left - right, the text root bracketing compiles"""
+        result = self.engine.parse_and_classify_expression("sin(x) = y*k")
+        assert sorted(result['variables']) == ['k', 'x', 'y']
+        sides = result['equation_parts']
+        assert _analyze_expression(f"({sides['left']}) - ({sides['right']})").variables == {'k', 'x', 'y'}
+
+    def test_single_letter_scan_matches_word_boundaries(self):
+        """The fallback scan finds isolated letters only"""
+        assert _single_letter_names("x^2 + sin(y) = a_1 + b2 + c") == {"x", "y", "c"}
+        assert _single_letter_names("") == set()
+
+    def test_letter_variables_defer_longer_names(self):
+        """Single-letter equations are read directly; functions and literals need a parse"""
+        assert _letter_variables("x**2 + a*y**2 = e") == {"x", "y", "a"}
+        assert _letter_variables("2 = 3") == frozenset()
+        assert _letter_variables("sin(x) = y") is None
+        assert _letter_variables("x = 1e5") is None
+
+    def test_extract_variables_returns_copy(self):
+        """Memoized variable extraction hands out independent sets"""
+        variables = self.engine.parser.extract_variables("a*x + b")
+        variables.add("z")
+        assert self.engine.parser.extract_variables("a*x + b") == {"a", "b", "x"}
+
+    def test_invalid_expression_raises(self):
+        """Validation failures surface as ValueError and are not cached"""
+        with pytest.raises(ValueError):
+            compile_kernel("__import__('os')")
+
+    def test_evaluator_matches_kernel(self):
+        """evaluate_expression uses the compiled kernel transparently"""
+        x = np.linspace(-2, 2, 9)
+        result = self.engine.evaluate_expression("a*x**2 + 2*x + 1", x, {"a": 3.0})
+        np.testing.assert_allclose(result, 3.0 * x**2 + 2 * x + 1)
+
+    def test_evaluate_finite_points(self):
+        """The fused path returns only finite points, matching evaluate_expression"""
+        x = np.linspace(-1, 1, 11)
+        xs, ys = self.engine.evaluate_finite_points("1/x", x)
+        expected = self.engine.evaluate_expression("1/x", x)
+        assert xs.size == ys.size == 10
+        np.testing.assert_array_equal(ys, expected[np.isfinite(expected)])
+
+        xs, ys = self.engine.evaluate_finite_points("5", x)
+        np.testing.assert_array_equal(ys, np.full(11, 5.0))
+
+    def test_evaluate_batch_shares_grid(self):
+        """Batched evaluation matches per-expression results and keeps failures in place"""
+        x = np.linspace(-2, 2, 9)
+        results = self.engine.evaluate_batch(["a*x", "bad((", "2"], (-2, 2), 9, {"a": 3.0})
+        np.testing.assert_allclose(results[0], 3.0 * x)
+        assert isinstance(results[1], ValueError)
+        np.testing.assert_array_equal(results[2], np.full(9, 2.0))
+
+        graphs = self.engine.generate_batch_graph_data(["1/x", "x"], (-1, 1), 11)
+        assert graphs[0] == self.engine.generate_graph_data("1/x", (-1, 1), 11)
+        assert graphs[1]['valid_points'] == 11
+
+    def test_soa_graph_data_keeps_arrays(self):
+        """The 'soa' layout hands contiguous arrays to the serializer instead of lists"""
+        graph = self.engine.generate_graph_data("1/x", (-1, 1), 11, layout="soa")
+        assert isinstance(graph['y'], np.ndarray) and graph['y'].flags.c_contiguous
+        assert graph['x'].tolist() == [point['x'] for point in self.engine.generate_graph_data("1/x", (-1, 1), 11)['coordinates']]
+
+    def test_parametric_uses_kernels(self):
+        """Parametric curves bind t and parameters to compiled kernels"""
+        x, y = self.engine.evaluate_parametric("r*cos(t)", "2", (0, np.pi), 5, {"r": 2.0})
+        np.testing.assert_allclose(x, 2.0 * np.cos(np.linspace(0, np.pi, 5)))
+        np.testing.assert_array_equal(y, np.full(5, 2.0))
+        with pytest.raises(ValueError, match="Undefined variables: k"):
+            self.engine.evaluate_parametric("k*t", "t", (0, 1), 5)
+
+    def test_single_precision_parametric_and_graph_data(self):
+        """float32 sampling stays float32 end to end and matches double precision"""
+        x, y = self.engine.evaluate_parametric("cos(t)", "sin(2*t)", (0, np.pi), 2048, dtype=np.float32)
+        assert x.dtype == y.dtype == np.float32
+        t = np.linspace(0, np.pi, 2048)
+        np.testing.assert_allclose(x, np.cos(t), atol=1e-6)
+        np.testing.assert_allclose(y, np.sin(2 * t), atol=1e-6)
+
+        graph = self.engine.generate_graph_data("x/3", (-1, 1), 10, layout="soa", dtype=np.float32)
+        assert graph['x'].dtype == graph['y'].dtype == np.float32
+        np.testing.assert_allclose(graph['y'], np.linspace(-1, 1, 10) / 3, rtol=1e-6)
+
+    def test_polynomials_use_horner(self):
+        """Single-variable polynomials with literal coefficients are expanded once and match numexpr"""
+        kernel = compile_kernel("3*x**2 - x/2 + (x + 1)**3")
+        assert kernel._coefficients == (1.0, 2.5, 6.0, 1.0)
+        x = np.linspace(-3, 3, 13)
+        np.testing.assert_allclose(kernel({'x': x}), 3 * x**2 - x / 2 + (x + 1)**3)
+
+        assert compile_kernel("a*x**2")._coefficients is None
+        assert compile_kernel("x**20")._coefficients is None
+        assert compile_kernel("x - x + 1")._coefficients is None
+        assert polynomial_coefficients(parse_tree("x/y"), "x") is None
+
+    def test_single_point_uses_scalar_code(self):
+        """Single points run the compiled scalar code and agree with array evaluation"""
+        kernel = compile_kernel("a*sin(x) + x**2")
+        assert kernel.at({'x': 2.0}, {'a': 3.0}) == pytest.approx(3 * np.sin(2.0) + 4.0)
+        assert kernel._scalar
+        assert np.isnan(self.engine.evaluate_single_point("1/x", 0.0))
+        assert self.engine.evaluate_single_point("sin(pi/2)", 0.0) == pytest.approx(1.0)
+
+    def test_numpy_fallback_for_unsupported_functions(self):
+        """Functions numexpr lacks are evaluated by the NumPy interpreter"""
+        kernel = compile_kernel("asin(x) + 1")
+        assert not kernel.is_numexpr_safe
+        assert compile_kernel("sin(x) + 1").is_numexpr_safe
+
+        x = np.array([0.5, 2.0])
+        result = self.engine.evaluate_expression("asin(x) + 1", x)
+        assert result[0] == pytest.approx(np.arcsin(0.5) + 1)
+        assert np.isnan(result[1])
+
+    def test_numpy_fallback_is_compiled_once(self):
+        """The NumPy fallback runs a cached function with float64 literals"""
+        kernel = compile_kernel("acos(x) + 1/0")
+        assert kernel._function is not None
+        result = kernel({'x': np.array([0.5])})
+        assert np.isinf(result[0])
+
+    def test_fallback_function_binds_positionally(self):
+        """Compiled fallback functions take their names in order, shadowing constants"""
+        function = compile_fallback("a*x + pi", ("a", "pi", "x"))
+        assert function(2.0, 1.0, 3.0) == 7.0
+        assert compile_fallback("x.real", ("x",)) is None
+
+    def test_fallback_computes_repeated_subexpressions_once(self):
+        """Shared subterms are bound to locals without changing results"""
+        function = compile_fallback("sin(x^2) + cos(x^2) * sin(x^2)", ("x",))
+        assert "_c0" in function.__code__.co_varnames
+        x = np.linspace(-2, 2, 9)
+        np.testing.assert_allclose(function(x), np.sin(x ** 2) + np.cos(x ** 2) * np.sin(x ** 2))
+
+    def test_small_arrays_skip_numexpr(self):
+        """Small inputs run on NumPy and agree with the numexpr program on large ones"""
+        kernel = compile_kernel("sin(a*x) * x + 1")
+        large = np.linspace(-2, 2, CompiledExpression.SMALL_ARRAY_SIZE * 2)
+        small = large[::64].copy()
+        np.testing.assert_allclose(kernel({'x': small}, {'a': 3.0}), kernel({'x': large}, {'a': 3.0})[::64])
+        assert kernel._scalar
+
+    def test_numexpr_runtime_failure_falls_back(self):
+        """Inputs the numexpr program rejects are evaluated with NumPy"""
+        kernel = CompiledExpression("sin(x) + x", ("x",))
+
+        def reject(*args):
+            raise NotImplementedError
+
+        kernel._program = reject
+        x = np.linspace(-1, 1, CompiledExpression.SMALL_ARRAY_SIZE)
+        np.testing.assert_allclose(kernel({'x': x}), np.sin(x) + x)
+
+    def test_shared_evaluator_is_lazy_singleton(self):
+        """The module-level evaluator is built once, on first use"""
+        from backend.core import math_engine
+        from backend.core.math_engine import get_evaluator
+        assert math_engine.evaluator is get_evaluator() is get_evaluator()
+
+    def test_compiled_expression_held_across_calls(self):
+        """compile preprocesses user input once; the kernel evaluates arrays and points"""
+        evaluator = ExpressionEvaluator()
+        kernel = evaluator.compile("2x^2 + a")
+        assert kernel is evaluator.compile("2x^2 + a")
+        x = np.array([0.0, 1.0, 2.0])
+        np.testing.assert_allclose(kernel.evaluate(x, a=1.0), 2 * x ** 2 + 1)
+        assert kernel.evaluate_scalar(3.0, a=0.5) == 18.5
+        assert np.isnan(evaluator.compile("1/x").evaluate_scalar(0.0))
+        with pytest.raises(ValueError):
+            evaluator.compile("__import__('os')")
+
+    def test_parse_tree_is_shared(self):
+        """Validation, variable extraction and kernels reuse one parsed tree"""
+        assert parse_tree("a*x + 1") is parse_tree("a*x + 1")
+
+    def test_hot_kernel_results_unchanged(self):
+        """Kernels past the JIT threshold return the same values, with or without Numba"""
+        kernel = compile_kernel("sin(a*x) + 1/x")
+        x = np.linspace(-1, 1, CompiledExpression.SMALL_ARRAY_SIZE + 1)
+        expected = np.sin(2.0 * x) + 1 / np.where(x == 0, np.nan, x)
+        for _ in range(CompiledExpression.JIT_THRESHOLD + 1):
+            result = kernel({'x': x}, {'a': 2.0})
+        np.testing.assert_allclose(np.where(np.isfinite(result), result, np.nan), expected)
+
+    def test_jit_compile_without_numba(self, monkeypatch):
+        """Without Numba the JIT tier is disabled and numexpr keeps serving the kernel"""
+        monkeypatch.setattr("backend.core.math_engine.numba", None)
+        jit_compile.cache_clear()
+        assert jit_compile("x + 1", ("x",)) is None
+        jit_compile.cache_clear()
+
+    def test_hot_kernel_samples_like_grid(self):
+        """Sampling a hot kernel keeps the same finite points as filtering the grid"""
+        kernel = compile_kernel("sin(a*x) + 1/x")
+        for _ in range(CompiledExpression.JIT_THRESHOLD + 1):
+            x_valid, y_valid, y_range = kernel.sample((-1.0, 1.0), 101, {'a': 2.0})
+        x = np.linspace(-1, 1, 101)
+        x = x[x != 0]
+        np.testing.assert_allclose(x_valid, x)
+        np.testing.assert_allclose(y_valid, np.sin(2.0 * x) + 1 / x)
+        np.testing.assert_allclose(y_range, (y_valid.min(), y_valid.max()))
+
+    def test_jit_sampler_needs_numba_and_x(self, monkeypatch):
+        """The fused sampler is only built for expressions in x with Numba available"""
+        jit_sampler.cache_clear()
+        assert jit_sampler("a + 1", ("a",)) is None
+        monkeypatch.setattr("backend.core.math_engine.numba", None)
+        assert jit_sampler("x + 1", ("x",)) is None
+        jit_sampler.cache_clear()
+
+    def test_classification_reports_fast_path(self):
+        """Explicit expressions report whether numexpr can evaluate them"""
+        assert self.engine.parse_and_classify_expression("x^2 + 1")["is_numexpr_safe"]
+        assert not self.engine.parser.is_numexpr_safe("atan(x)")
+
+
+class TestValidation:
+    """Test module-level validation tables"""
+
+    def test_unsupported_construct_reports_first_listed_pattern(self):
+        """Patterns are reported in list order, not by position in the expression"""
+        assert unsupported_construct("x + 1") is None
+        assert unsupported_construct("x-- + __a__") == r'__.*__'
+        assert unsupported_construct("EVAL (x)") == r'eval\s*\('
+
+    def test_validation_and_variables_share_one_walk(self):
+        """Disallowed nodes are reported and variables extracted from the same parse"""
+        parser = ExpressionParser()
+        assert parser.validate_expression("lambda: x") == (False, "Unsupported expression construct: Lambda")
+        assert parser.extract_variables("a*sin(x) + pi") == {"a", "x"}
+
+    def test_walk_matches_ast_walk(self):
+        """The inlined walk reports the same first disallowed node, names and calls as ast.walk"""
+        for expression in ("[i for i in x]", "f(y)[k] + sin(x)*z", "(lambda: x)(1) + {a: b}", "x if a else pi"):
+            nodes = list(ast.walk(parse_tree(expression)))
+            calls = [node for node in nodes if isinstance(node, ast.Call)]
+            called = {id(node.func) for node in calls}
+            facts = _analyze_expression(expression)
+            assert facts.unsupported == next((type(node).__name__ for node in nodes if type(node) not in ALLOWED_NODES), None)
+            assert facts.variables == {node.id for node in nodes if isinstance(node, ast.Name) and node.id not in RESERVED_NAMES}
+            assert facts.arguments == {node.id for node in nodes if isinstance(node, ast.Name) and id(node) not in called}
+            assert facts.numexpr_safe == all(isinstance(node.func, ast.Name) and node.func.id in NUMEXPR_FUNCTIONS for node in calls)
+
+
+class TestTokenReplacement:
+    """Test single-pass LaTeX and HTML entity conversion"""
+
+    def test_parser_conversions(self):
+        """Capture-group LaTeX rules run before the literal tokens, entities in one scan"""
+        parser = ExpressionParser()
+        assert parser.convert_latex_to_ascii(r"\frac{\pi}{2} \cdot x^2") == "(pi)/(2) * x**2"
+        assert parser.convert_html_entities("x&sup2; &le; &pi;") == "x^2 <= pi"
+        assert parser.convert_html_entities("x & y") == "x & y"
+
+    def test_evaluator_symbols(self):
+        """Greek letters and operators sharing a prefix are each replaced whole"""
+        evaluator = ExpressionEvaluator()
+        assert evaluator.convert_latex_to_ascii(r"\pi \phi \Pi \int \infty \leq") == "pi phi Pi int inf <="
+
+    def test_evaluator_delimiters_and_scripts(self):
+        """Sized delimiters, scripts and stray backslashes are rewritten; plain text passes through"""
+        evaluator = ExpressionEvaluator()
+        assert evaluator.convert_latex_to_ascii(r"\left(x^{2}\right( + a_{1} \, ") == "(x^2) + a_1 ,"
+        assert evaluator.convert_latex_to_ascii("  x^2 + 1 ") == "x^2 + 1"
+
+
+class TestNanInvalid:
+    """Test in-place infinity sanitizing"""
+
+    def test_replaces_infinities_in_place(self):
+        """Owned arrays are sanitized without a copy"""
+        values = np.array([1.0, np.inf, -np.inf, np.nan])
+        result = nan_invalid(values)
+        assert result is values
+        assert result[0] == 1.0 and np.isnan(result[1:]).all()
+
+    def test_never_writes_through_shared_arrays(self):
+        """Read-only arrays and broadcast views are copied before sanitizing"""
+        shared = np.array([1.0, np.inf])
+        shared.setflags(write=False)
+        result = nan_invalid(shared)
+        assert result is not shared and np.isnan(result[1])
+        assert shared[1] == np.inf
+
+        view = np.broadcast_to(np.inf, (3,))
+        assert np.isnan(nan_invalid(view)).all()
+
+    def test_owned_views_are_sanitized_in_place(self):
+        """Writable views the caller owns skip the copy"""
+        points = np.array([1 + 1j, np.inf + 2j])
+        assert nan_invalid(points.real, owned=True).base is points
+        assert np.isnan(points[1].real) and points[1].imag == 2.0
+
+    def test_finite_input_is_not_copied(self):
+        """Fully finite arrays, shared grids included, come back as is"""
+        grid = linspace_grid(-1.0, 1.0, 3)
+        assert nan_invalid(grid) is grid
+        assert not grid.flags.writeable
+
+    def test_all_finite_survives_overflowing_sums(self):
+        """Sums that overflow fall back to the exact check"""
+        big = np.finfo(np.float64).max
+        assert all_finite(np.array([big, big]))
+        assert all_finite(np.array([], dtype=np.float32))
+        assert not all_finite(np.array([big, -np.inf]))
+        assert not all_finite(np.array([1.0, np.nan]))
+
+    def test_scalar_results_become_nan(self):
+        """0-d and scalar results, as constant expressions produce, are sanitized too"""
+        assert np.isnan(nan_invalid(np.float64(np.inf)))
+        assert np.isnan(nan_invalid(np.asarray(-np.inf)))
+        assert nan_invalid(np.asarray(2.0)) == 2.0
+        with np.errstate(divide='ignore'):
+            assert np.isnan(ExpressionEvaluator().evaluate_expression("log(0)", np.linspace(-1, 1, 5))).all()
+
+
+class TestKeepFinite:
+    """Test the shared finite-point filter"""
+
+    def test_drops_non_finite_points(self):
+        """Only points with finite y survive, on both axes"""
+        xs, ys = keep_finite(np.arange(4.0), np.array([1.0, np.nan, np.inf, 2.0]))
+        np.testing.assert_array_equal(xs, [0.0, 3.0])
+        np.testing.assert_array_equal(ys, [1.0, 2.0])
+
+    def test_all_finite_is_not_copied(self):
+        """Fully finite input is returned as is, with broadcast y made contiguous"""
+        x = np.arange(3.0)
+        xs, ys = keep_finite(x, np.broadcast_to(5.0, (3,)))
+        assert xs is x
+        assert ys.flags.c_contiguous
+        np.testing.assert_array_equal(ys, [5.0, 5.0, 5.0])
+
+    def test_finite_mask_reuses_scratch_buffer(self):
+        """Masks of the same or smaller size share one per-thread buffer"""
+        first = finite_mask(np.array([1.0, np.nan, 2.0, np.inf]))
+        np.testing.assert_array_equal(first, [True, False, True, False])
+        second = finite_mask(np.array([[np.nan], [3.0]]))
+        np.testing.assert_array_equal(second, [[False], [True]])
+        assert np.shares_memory(first, second)
+
+    def test_summary_skips_non_finite_values(self):
+        """Count, min and max cover only the finite values"""
+        assert finite_summary(np.array([np.nan, 3.0, -np.inf, -2.0, np.inf])) == (2, -2.0, 3.0)
+        count, low, high = finite_summary(np.array([np.nan, np.inf]))
+        assert count == 0 and np.isnan(low) and np.isnan(high)
+
+    def test_filter_returns_kept_range(self):
+        """The y range is computed in the same pass as the filter"""
+        xs, ys, y_range = keep_finite_range(np.arange(4.0), np.array([1.0, np.nan, 7.0, -1.0]))
+        np.testing.assert_array_equal(xs, [0.0, 2.0, 3.0])
+        assert y_range == (-1.0, 7.0)
+        assert keep_finite_range(np.arange(2.0), np.array([np.nan, np.nan]))[2] is None
+
+
+class TestSampleGrids:
+    """Test shared read-only sample grids"""
+
+    def test_linspace_grid_is_shared_and_read_only(self):
+        """The same range and size return one cached, immutable array"""
+        grid = linspace_grid(-1.0, 1.0, 5)
+        assert grid is linspace_grid(-1.0, 1.0, 5)
+        np.testing.assert_array_equal(grid, np.linspace(-1, 1, 5))
+        with pytest.raises(ValueError):
+            grid[0] = 10.0
+
+    def test_unit_circle_scales_to_conics(self):
+        """Circles and ellipses scale the shared unit circle"""
+        cos, sin = unit_circle(8)
+        assert unit_circle(8)[0] is cos and not cos.flags.writeable
+        angles = np.linspace(0, 2 * np.pi, 8)
+        np.testing.assert_allclose(cos, np.cos(angles))
+
+        x, y = ExpressionEvaluator().solve_implicit_equation("x^2/4 + y^2/9 = 1", (-3, 3), 8)
+        np.testing.assert_allclose(x, 2 * np.cos(angles))
+        np.testing.assert_allclose(y, 3 * np.sin(angles))
+        assert x.base is y.base and not x.flags.writeable
+        again = ExpressionEvaluator().solve_implicit_equation("x^2/4 + y^2/9 = 1", (-3, 3), 8)
+        assert again[0] is x and again[1] is y
+
+        x, y = ExpressionEvaluator().solve_implicit_equation("x^2 + y^2 = 4", (-3, 3), 8)
+        np.testing.assert_allclose(np.hypot(x, y), 2.0)
+
+    def test_mesh_grid_matches_meshgrid(self):
+        """Cached meshes match numpy.meshgrid output"""
+        X, Y = mesh_grid(0.0, 1.0, -1.0, 0.0, 4)
+        expected_X, expected_Y = np.meshgrid(np.linspace(0, 1, 4), np.linspace(-1, 0, 4))
+        np.testing.assert_array_equal(X, expected_X)
+        np.testing.assert_array_equal(Y, expected_Y)
+        assert not X.flags.writeable and not Y.flags.writeable
+
+
+class TestFiniteKernels:
+    """Test skipping the non-finite scan for expressions that cannot produce NaN or infinity"""
+
+    def test_finite_expressions(self):
+        """Sums and products of bounded functions are finite; poles and domains are not"""
+        for expression in ("x*x + 3*x - 1", "sin(x)*cos(x)", "-abs(x) + tanh(x)", "a*x + b"):
+            assert _analyze_expression(expression).finite, expression
+        for expression in ("1/x", "x**2", "log(x)", "sqrt(x)", "exp(x)", "tan(x)", "x % 2", "1e400*x", "x if a else 1"):
+            assert not _analyze_expression(expression).finite, expression
+
+    def test_finite_kernel_skips_scan(self):
+        """Finite kernels hand back the kernel output; others still replace infinities"""
+        evaluator = ExpressionEvaluator()
+        x = np.linspace(-1, 1, 5)
+        assert compile_kernel("x*x + 1").finite
+        np.testing.assert_allclose(evaluator.evaluate_expression("x*x + 1", x), x * x + 1)
+
+        assert not compile_kernel("1/x").finite
+        assert np.isnan(evaluator.evaluate_expression("1/x", x)[2])
+        xs, ys = evaluator.evaluate_finite_points("1/x", x)
+        assert xs.size == ys.size == 4
+
+
+class TestParametricPairs:
+    """Test evaluating both parametric components in one numexpr pass"""
+
+    def test_fused_components_match(self):
+        """Long curves split the fused complex result back into x(t) and y(t)"""
+        num_points = CompiledExpression.SMALL_ARRAY_SIZE * 2
+        x, y = ExpressionEvaluator().evaluate_parametric("a*cos(t)", "sin(t)*cos(t)", (0, 2 * np.pi), num_points, {'a': 2.0})
+        t = np.linspace(0, 2 * np.pi, num_points)
+        np.testing.assert_allclose(x, 2 * np.cos(t))
+        np.testing.assert_allclose(y, np.sin(t) * np.cos(t), atol=1e-15)
+        assert pair_program(compile_kernel("a*cos(t)"), compile_kernel("sin(t)*cos(t)")) is not None
+
+    def test_invalid_component_does_not_spread(self):
+        """A pole in y(t) leaves x(t) at that point intact"""
+        x, y = ExpressionEvaluator().evaluate_parametric("t", "1/(t - 1)", (0, 2), 2049)
+        assert x[1024] == 1.0 and np.isnan(y[1024])
+        assert np.isfinite(np.delete(y, 1024)).all()
+        # Invalid points of the paired result are cleared in place, not in a copy
+        assert x.base is y.base
+
+
+class TestImplicitBracketing:
+    """Test the vectorized root bracketing behind general implicit equations"""
+
+    def test_hyperbola_points_satisfy_equation(self):
+        """Equations no pattern recognizes are solved to full precision"""
+        x, y = ExpressionEvaluator().solve_implicit_equation("x^2 - y^2 = 1", (-3, 3), 200)
+        assert x.size > 0 and x.size == y.size
+        np.testing.assert_allclose(x ** 2 - y ** 2, 1, atol=1e-9)
+        assert (y > 0).any() and (y < 0).any()
+
+    def test_poles_are_not_roots(self):
+        """Sign changes through a pole are dropped"""
+        x, y = ExpressionEvaluator().solve_implicit_equation("1/y = x", (-4, 4), 100)
+        assert x.size > 0
+        np.testing.assert_allclose(x * y, 1, atol=1e-9)
+
+    def test_no_real_solutions(self):
+        """Equations without real points, or without an equals sign, give no points"""
+        evaluator = ExpressionEvaluator()
+        for equation in ("x^2 + y^2 + 4 = 0", "x^2 + y^2"):
+            x, y = evaluator.solve_implicit_equation(equation, (-3, 3), 100)
+            assert x.size == y.size == 0
+
+
+class TestSurfacePoints:
+    """Test array-returning 3D evaluation"""
+
+    def setup_method(self):
+        """Set up ExpressionEvaluator instance for each test"""
+        self.engine = ExpressionEvaluator()
+
+    def test_surface_points_drop_non_finite(self):
+        """Only finite (x, y, z) rows are returned, matching the list form"""
+        points, z_range = self.engine.surface_points("1/(x*y)", (-1, 1), (-1, 1), 5)
+        coordinates, list_z_range = self.engine.evaluate_3d_surface("1/(x*y)", (-1, 1), (-1, 1), 5)
+        assert points.shape == (16, 3)
+        assert np.isfinite(points).all()
+        assert [tuple(point) for point in points.tolist()] == coordinates
+        assert z_range == list_z_range == (-4.0, 4.0)
+
+    def test_parametric_surface_points(self):
+        """Parametric surfaces evaluate every component over the (u, v) grid"""
+        points, z_range = self.engine.parametric_surface_points("u", "v", "u*v", (0, 1), (0, 2), 3)
+        assert points.shape == (9, 3)
+        np.testing.assert_allclose(points[:, 2], points[:, 0] * points[:, 1])
+        assert z_range == (0.0, 2.0)
+
+    def test_surfaces_reject_undefined_variables(self):
+        """Names that are not an axis, a parameter or a constant fail instead of evaluating to 0"""
+        with pytest.raises(ValueError, match="Undefined variables: a"):
+            self.engine.surface_points("a*x + y", (-1, 1), (-1, 1), 5)
+        with pytest.raises(ValueError, match="Undefined variables: a"):
+            self.engine.parametric_surface_points("a*u", "v", "pi*u", (0, 1), (0, 1), 3)
+        points, _ = self.engine.surface_points("a*x + y", (-1, 1), (-1, 1), 5, {"a": 2.0})
+        assert points.shape == (25, 3)
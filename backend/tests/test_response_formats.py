@@ -0,0 +1,240 @@
+"""
+Response layout tests for Grapher backend.
+Tests the alternative coordinate layouts returned by the graphing endpoints.
+"""
+
+import pytest
+import base64
+import json
+import numpy as np
+from fastapi.testclient import TestClient
+
+# Import the main application
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from main import app
+
+client = TestClient(app)
+
+
+class TestStructOfArraysLayout:
+    """Test the 'soa' coordinate layout"""
+
+    def test_evaluate_soa_matches_aos(self):
+        """Parallel x/y arrays carry the same points as the coordinate list"""
+        payload = {"expression": "1/x", "x_range": [-1, 1], "num_points": 11}
+        aos = client.post("/api/evaluate", json=payload).json()["graph_data"]
+        soa = client.post("/api/evaluate", json={**payload, "format": "soa"}).json()["graph_data"]
+
+        assert "x" not in aos and "y" not in aos
+        assert soa["coordinates"] == []
+        assert soa["x"] == [point["x"] for point in aos["coordinates"]]
+        assert soa["y"] == [point["y"] for point in aos["coordinates"]]
+        assert soa["valid_points"] == aos["valid_points"] == 10
+
+    def test_parametric_soa(self):
+        """Parametric curves can be returned as parallel arrays"""
+        response = client.post("/api/parametric", json={
+            "x_expression": "cos(t)",
+            "y_expression": "sin(t)",
+            "num_points": 20,
+            "format": "soa"
+        })
+        assert response.status_code == 200
+        graph_data = response.json()["graph_data"]
+        assert len(graph_data["x"]) == len(graph_data["y"]) == 20
+
+    def test_parametric_single_precision(self):
+        """Parametric curves without high precision print at float32 length"""
+        payload = {"x_expression": "cos(t)", "y_expression": "sin(t)", "num_points": 20, "format": "soa"}
+        double = client.post("/api/parametric", json=payload).json()["graph_data"]
+        single = client.post("/api/parametric", json={**payload, "high_precision": False}).json()["graph_data"]
+
+        np.testing.assert_allclose(single["x"], double["x"], atol=1e-6)
+        assert single["x"] == [float(str(x)) for x in np.float32(single["x"])]
+
+    def test_update_params_soa(self):
+        """Parameter updates can be returned as parallel arrays, tagged apart from 'aos'"""
+        payload = {"expression": "a*x", "variables": {"a": 2.0}, "x_range": [-1, 1]}
+        aos = client.post("/api/update-params", json=payload)
+        soa = client.post("/api/update-params", json={**payload, "format": "soa"})
+        assert aos.status_code == soa.status_code == 200
+        assert aos.headers["etag"] != soa.headers["etag"]
+
+        graph_data = soa.json()["graph_data"]
+        assert graph_data["coordinates"] == []
+        assert graph_data["y"] == [point["y"] for point in aos.json()["graph_data"]["coordinates"]]
+
+    def test_surface_3d_soa(self):
+        """3D surfaces can be returned as parallel x/y/z arrays"""
+        response = client.post("/api/surface-3d", json={
+            "expression": "x + y",
+            "x_range": [-1, 1],
+            "y_range": [-1, 1],
+            "resolution": 10,
+            "format": "soa"
+        })
+        assert response.status_code == 200
+        graph_data = response.json()["graph_data"]
+        assert len(graph_data["x"]) == len(graph_data["y"]) == len(graph_data["z"]) == 100
+
+    def test_evaluate_binary_matches_soa(self):
+        """Binary buffers decode to the soa arrays at float32 precision"""
+        payload = {"expression": "sin(x)", "x_range": [-3, 3], "num_points": 50}
+        soa = client.post("/api/evaluate", json={**payload, "format": "soa"}).json()["graph_data"]
+        binary = client.post("/api/evaluate", json={**payload, "format": "binary"}).json()["graph_data"]
+
+        assert binary["coordinates"] == [] and "x" not in binary
+        xs = np.frombuffer(base64.b64decode(binary["x_b64"]), dtype='<f4')
+        ys = np.frombuffer(base64.b64decode(binary["y_b64"]), dtype='<f4')
+        assert xs.size == ys.size == binary["valid_points"] == 50
+        np.testing.assert_allclose(xs, soa["x"], rtol=1e-6)
+        np.testing.assert_allclose(ys, soa["y"], rtol=1e-6, atol=1e-7)
+
+    def test_surface_3d_binary(self):
+        """3D surfaces can be returned as x/y/z float32 buffers"""
+        response = client.post("/api/surface-3d", json={
+            "expression": "x*y",
+            "x_range": [-1, 1],
+            "y_range": [-1, 1],
+            "resolution": 10,
+            "format": "binary"
+        })
+        assert response.status_code == 200
+        graph_data = response.json()["graph_data"]
+        sizes = [len(base64.b64decode(graph_data[f"{axis}_b64"])) for axis in ("x", "y", "z")]
+        assert sizes == [400, 400, 400]
+
+    def test_surface_3d_grid(self):
+        """The grid layout ships only z over the full grid, NaN where undefined"""
+        response = client.post("/api/surface-3d", json={
+            "expression": "1/(x*y)",
+            "x_range": [-1, 1],
+            "y_range": [-1, 1],
+            "resolution": 11,
+            "format": "grid"
+        })
+        assert response.status_code == 200
+        graph_data = response.json()["graph_data"]
+        z = np.frombuffer(base64.b64decode(graph_data["z_b64"]), dtype='<f4').reshape(11, 11)
+        assert "x_b64" not in graph_data and "y_b64" not in graph_data
+        assert np.isnan(z[5]).all() and np.isnan(z[:, 5]).all()
+        assert graph_data["valid_points"] == 100
+        np.testing.assert_allclose(z[0, 0], 1.0)
+
+    def test_batch_soa(self):
+        """Batch results honor the requested layout"""
+        payload = {"expressions": ["x", "x^2"], "x_range": [0, 1], "num_points": 10}
+        aos = client.post("/api/batch-evaluate", json=payload).json()["results"]
+        soa = client.post("/api/batch-evaluate", json={**payload, "format": "soa"}).json()["results"]
+
+        for aos_result, soa_result in zip(aos, soa):
+            assert soa_result["graph_data"]["coordinates"] == []
+            assert soa_result["graph_data"]["y"] == [point["y"] for point in aos_result["graph_data"]["coordinates"]]
+
+    def test_single_precision_soa(self):
+        """Requests without high precision are evaluated in float32 and print at float32 length"""
+        payload = {"expression": "x/3", "x_range": [-1, 1], "num_points": 10, "format": "soa"}
+        double = client.post("/api/evaluate", json=payload).json()["graph_data"]
+        single = client.post("/api/evaluate", json={**payload, "high_precision": False}).json()["graph_data"]
+
+        assert single["valid_points"] == double["valid_points"] == 10
+        np.testing.assert_allclose(single["y"], double["y"], rtol=1e-6)
+        # orjson prints each float32 at its shortest round-tripping length
+        assert single["y"] == [float(str(y)) for y in np.float32(single["y"])]
+
+    def test_single_precision_large_grid(self):
+        """float32 requests big enough for the numexpr program evaluate like float64 ones"""
+        payload = {"expression": "sin(x)*2.5 + a", "variables": {"a": 1.0}, "x_range": [-1, 1], "num_points": 2048}
+        double = client.post("/api/evaluate", json=payload)
+        single = client.post("/api/evaluate", json={**payload, "high_precision": False})
+
+        assert single.status_code == double.status_code == 200
+        ys = [point["y"] for point in single.json()["graph_data"]["coordinates"]]
+        expected = [point["y"] for point in double.json()["graph_data"]["coordinates"]]
+        np.testing.assert_allclose(ys, expected, atol=1e-6)
+
+    def test_unknown_layout_rejected(self):
+        """Unsupported layouts fail request validation"""
+        response = client.post("/api/evaluate", json={"expression": "x", "format": "columns"})
+        assert response.status_code == 422
+
+
+class TestStreamingResponses:
+    """Test the NDJSON streaming endpoints"""
+
+    @staticmethod
+    def decode(encoded):
+        return np.frombuffer(base64.b64decode(encoded), dtype='<f4')
+
+    def test_stream_expression(self):
+        """Streamed chunks reassemble into y = f(x) over the header's grid"""
+        response = client.post("/api/evaluate/stream", json={
+            "expression": "x^2",
+            "x_range": [-2, 2],
+            "num_points": 2500
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        header, chunks = lines[0], lines[1:]
+        assert header["num_points"] == 2500
+        assert len(chunks) == 3
+        assert [chunk["offset"] for chunk in chunks] == [0, 1024, 2048]
+
+        y = np.concatenate([self.decode(chunk["y"]) for chunk in chunks])
+        x = np.linspace(-2, 2, 2500)
+        np.testing.assert_allclose(y, x ** 2, rtol=1e-6)
+
+    def test_stream_evaluates_on_worker_pool(self):
+        """The grid is evaluated once on a worker thread, then sent in chunks"""
+        import threading
+        from unittest.mock import patch
+        from backend.core.math_engine import ExpressionEvaluator
+        threads = []
+        evaluate = ExpressionEvaluator.evaluate_expression
+
+        def recording_evaluate(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return evaluate(self, *args, **kwargs)
+
+        with patch.object(ExpressionEvaluator, "evaluate_expression", recording_evaluate):
+            response = client.post("/api/evaluate/stream", json={"expression": "x^3", "num_points": 2500})
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 4
+        assert len(threads) == 1 and threads[0].startswith("grapher-eval")
+
+    def test_stream_marks_invalid_points_nan(self):
+        """Points outside the domain are streamed as NaN"""
+        response = client.post("/api/evaluate/stream", json={"expression": "1/x", "x_range": [-1, 1], "num_points": 11})
+        y = self.decode(json.loads(response.text.splitlines()[1])["y"])
+        assert np.isnan(y[5])
+        assert np.isfinite(np.delete(y, 5)).all()
+
+    def test_stream_rejects_invalid_expression(self):
+        """Invalid expressions fail before streaming starts"""
+        response = client.post("/api/evaluate/stream", json={"expression": "__import__('os')"})
+        assert response.status_code == 400
+
+    def test_stream_surface_rejects_undefined_variables(self):
+        """Unbound names fail before the surface stream starts"""
+        response = client.post("/api/surface-3d/stream", json={"expression": "a*x + y", "resolution": 10})
+        assert response.status_code == 400
+        assert "Undefined variables: a" in response.json()["detail"]
+
+    def test_stream_surface_rows(self):
+        """3D surfaces stream one row of z values per line"""
+        response = client.post("/api/surface-3d/stream", json={
+            "expression": "x*y",
+            "x_range": [-1, 1],
+            "y_range": [0, 1],
+            "resolution": 10
+        })
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["resolution"] == 10
+        rows = [self.decode(line["z"]) for line in lines[1:]]
+        assert len(rows) == 10
+        np.testing.assert_allclose(rows[-1], np.linspace(-1, 1, 10), rtol=1e-6)